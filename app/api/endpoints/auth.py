@@ -1,23 +1,28 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from app.schemas.user import UserLogin, Token, UserCreate, PasswordUpdate
+from app.schemas.user import UserLogin, Token, TokenRefresh, UserCreate, PasswordUpdate
 from app.services.auth import AuthService
 from app.services.user import UserService
 from app.utils.response import ResponseModel
 from app.utils.exceptions import CustomException, ErrorCode
-from app.utils.dependencies import get_current_active_user, check_preview
+from app.utils.dependencies import get_current_active_user, check_preview, oauth2_scheme
+from app.core.security import decode_access_token
+from app.core.ratelimit import rate_limit
 from app.core.config import settings
-from captcha.image import ImageCaptcha
-import random
-import string
-import io
-import base64
 
 router = APIRouter()
 
 
 @router.post("/login", name="用户登录")
-async def login(user_data: UserLogin, request: Request):
+async def login(
+        user_data: UserLogin,
+        request: Request,
+        _limit: bool = Depends(rate_limit(
+            "login",
+            ip=settings.RATE_LIMIT_LOGIN_IP,
+            username=settings.RATE_LIMIT_LOGIN_USERNAME,
+        )),
+):
     """用户登录"""
     # 预览环境下可快速登录，不用验证码
     # if settings.IS_PREVIEW and user_data.is_quick:
@@ -29,7 +34,7 @@ async def login(user_data: UserLogin, request: Request):
         return ResponseModel.success(token_data, originUrl=request.url.path)
 
     # 验证验证码
-    if not user_data.captcha:
+    if not await AuthService.validate_captcha(user_data.captcha_id, user_data.captcha):
         raise CustomException(ErrorCode.ERR_10003)
 
     # 验证用户
@@ -42,7 +47,11 @@ async def login(user_data: UserLogin, request: Request):
 
 
 @router.post("/register", name="用户注册")
-async def register(user_data: UserCreate, request: Request):
+async def register(
+        user_data: UserCreate,
+        request: Request,
+        _limit: bool = Depends(rate_limit("register", ip=settings.RATE_LIMIT_REGISTER_IP)),
+):
     """用户注册"""
     # 检查是否为预览环境
     if not settings.IS_PREVIEW:
@@ -53,44 +62,50 @@ async def register(user_data: UserCreate, request: Request):
 
 
 @router.get("/refresh-token", name="刷新用户 Token")
-async def refresh_token(request: Request, current_user=Depends(get_current_active_user)):
-    """刷新令牌"""
-    token_data = await AuthService.login(current_user)
+async def refresh_token(
+        request: Request,
+        token: str = Depends(oauth2_scheme),
+        current_user=Depends(get_current_active_user),
+):
+    """刷新令牌（访问令牌仍有效时）"""
+    token_data = await AuthService.renew_access_token(current_user.id, decode_access_token(token))
+    return ResponseModel.success(token_data, originUrl=request.url.path)
+
+
+@router.post("/refresh", name="使用刷新令牌续期")
+async def refresh(
+        refresh_data: TokenRefresh,
+        request: Request,
+        _limit: bool = Depends(rate_limit("refresh", ip=settings.RATE_LIMIT_REFRESH_IP)),
+):
+    """使用刷新令牌换取新的访问令牌和刷新令牌，访问令牌过期后无需重新登录"""
+    token_data = await AuthService.refresh(refresh_data.refreshToken)
     return ResponseModel.success(token_data, originUrl=request.url.path)
 
 @router.post("/logout", name="账号退出登录")
-async def logout(request: Request, current_user=Depends(get_current_active_user)):
+async def logout(
+        request: Request,
+        token: str = Depends(oauth2_scheme),
+        current_user=Depends(get_current_active_user),
+):
     """用户登出"""
-    await AuthService.logout(current_user.id)
+    await AuthService.logout(current_user.id, decode_access_token(token))
     return ResponseModel.success(message="登出成功", originUrl=request.url.path)
 
 
 @router.get("/captcha", name="生成验证码")
 async def create_captcha(request: Request):
     """生成验证码"""
-    # 生成随机验证码
-    captcha_text = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-
-    # 创建验证码图片
-    image = ImageCaptcha(width=160, height=60)
-    captcha_image = image.generate(captcha_text)
-
-    # 转换为base64
-    captcha_bytes = io.BytesIO()
-    captcha_image.seek(0)  # 确保从头开始读取
-    captcha_bytes.write(captcha_image.read())
-    captcha_bytes.seek(0)
-    captcha_base64 = base64.b64encode(captcha_bytes.read()).decode('utf-8')
-
-    return ResponseModel.success({
-        "captcha": captcha_base64,
-        "code": captcha_text
-    }, originUrl=request.url.path)
+    # 从预渲染池中取出验证码，答案只保存在服务端
+    captcha_data = await AuthService.create_captcha()
+    return ResponseModel.success(captcha_data, originUrl=request.url.path)
 
 
 @router.post("/password", name="用户修改密码")
 async def change_password(
         password_data: PasswordUpdate,
+        request: Request,
+        _limit: bool = Depends(rate_limit("password", token=settings.RATE_LIMIT_PASSWORD_TOKEN)),
         current_user=Depends(get_current_active_user),
 ):
     """修改密码"""
@@ -106,8 +121,7 @@ async def change_password(
     )
 
     if result:
-        # 修改密码后退出登录
-        await AuthService.logout(current_user.id)
+        # 修改密码后退出登录：重置密码时已吊销该用户此前签发的全部令牌
         return ResponseModel.success(message="密码修改成功", originUrl=request.url.path)
 
     raise CustomException(ErrorCode.ERR_10004)
\ No newline at end of file
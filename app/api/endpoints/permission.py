@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, Path, Query
-from app.schemas.permission import PermissionCreate, PermissionUpdate, PermissionQuery
+from app.schemas.permission import PermissionCreate, PermissionUpdate, PermissionQuery, ButtonBatchQuery, MenuPathBatchQuery, PermissionCheckQuery
 from app.services.permission import PermissionService
-from app.utils.response import ResponseModel
+from app.services.authz import AuthzService
+from app.services.permission_bits import PermissionBitsService
+from app.services.permission_changes import permission_change_log
+from app.utils.response import ResponseModel, EncodedJSONResponse
 from app.utils.exceptions import CustomException, ErrorCode
-from app.utils.dependencies import get_current_active_user, check_roles, check_preview
+from app.utils.dependencies import get_current_active_user, check_roles, check_preview, admin_write_limit, permission_etag
+from app.utils.etag import etag_headers
 from typing import List, Optional
 
 router = APIRouter()
@@ -11,6 +15,7 @@ router = APIRouter()
 @router.post("", response_model=dict, name="创建用户权限")
 async def create_permission(
     permission_data: PermissionCreate,
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -26,29 +31,46 @@ async def get_permissions(
     code: Optional[str] = None,
     type: Optional[str] = None,
     enable: Optional[bool] = None,
+    cursor: Optional[str] = Query(None, max_length=256),
+    totalMode: str = Query("exact", pattern="^(exact|estimate|none)$"),
     current_user = Depends(get_current_active_user)
 ):
-    """获取权限列表"""
-    result = await PermissionService.get_permissions(page, page_size, name, code, type, enable)
+    """获取权限列表（传入 cursor 时使用游标分页，第一页传空字符串）"""
+    result = await PermissionService.get_permissions(page, page_size, name, code, type, enable, cursor, totalMode)
     return ResponseModel.success(result)
 
 @router.get("/tree", response_model=dict, name="获取权限树")
-async def get_permission_tree(current_user = Depends(get_current_active_user)):
+async def get_permission_tree(
+    current_user = Depends(get_current_active_user),
+    etag: str = Depends(permission_etag("permission_tree"))
+):
     """获取权限树"""
-    tree = await PermissionService.get_permission_tree()
-    return ResponseModel.success(tree)
+    return EncodedJSONResponse(await PermissionService.get_encoded_tree("permission_tree"), headers=etag_headers(etag))
 
 @router.get("/menu/tree", response_model=dict, name="获取菜单树")
-async def get_menu_tree(current_user = Depends(get_current_active_user)):
+async def get_menu_tree(
+    current_user = Depends(get_current_active_user),
+    etag: str = Depends(permission_etag("menu_tree"))
+):
     """获取菜单树"""
-    tree = await PermissionService.get_menu_tree()
-    return ResponseModel.success(tree)
+    return EncodedJSONResponse(await PermissionService.get_encoded_tree("menu_tree"), headers=etag_headers(etag))
 
 @router.get("/resource/menu/tree", response_model=dict, name="获取资源管理菜单树")
-async def get_resource_menu_tree(current_user = Depends(get_current_active_user)):
+async def get_resource_menu_tree(
+    current_user = Depends(get_current_active_user),
+    etag: str = Depends(permission_etag("resource_menu_tree"))
+):
     """获取资源管理菜单树（包括禁用的菜单）"""
-    tree = await PermissionService.get_resource_menu_tree()
-    return ResponseModel.success(tree)
+    return EncodedJSONResponse(await PermissionService.get_encoded_tree("resource_menu_tree"), headers=etag_headers(etag))
+
+@router.get("/children", response_model=dict, name="获取下级权限")
+async def get_permission_children(
+    parentId: Optional[int] = Query(None, ge=1),
+    type: Optional[str] = Query(None, pattern="^(MENU|BUTTON)$"),
+    current_user = Depends(get_current_active_user)
+):
+    """获取直接下级权限（不传 parentId 时返回根节点），用于按需展开权限树"""
+    return EncodedJSONResponse(await PermissionService.get_encoded_children(parentId, type))
 
 @router.get("/button/{menu_id}", response_model=dict, name="获取特定菜单下的按钮权限")
 async def get_button_permissions(
@@ -59,12 +81,68 @@ async def get_button_permissions(
     buttons = await PermissionService.get_button_permissions(menu_id)
     return ResponseModel.success(buttons)
 
+@router.post("/button/batch", response_model=dict, name="批量获取菜单下的按钮权限")
+async def get_button_permissions_batch(
+    query: ButtonBatchQuery,
+    current_user = Depends(get_current_active_user)
+):
+    """批量获取多个菜单下的按钮权限，只返回当前用户角色拥有的按钮"""
+    snapshot = await AuthzService.get_snapshot(current_user.id)
+    permission_codes = None if snapshot.is_super_admin else set(snapshot.permission_codes)
+    buttons = await PermissionService.get_button_permissions_batch(query.menuIds, permission_codes)
+    return ResponseModel.success(buttons)
+
+@router.post("/check", response_model=dict, name="批量检查当前用户权限")
+async def check_permissions(
+    query: PermissionCheckQuery,
+    current_user = Depends(get_current_active_user)
+):
+    """批量检查当前用户是否拥有各权限编码"""
+    bits = await PermissionBitsService.get_bits(current_user.id)
+    return ResponseModel.success({code: bits.has(code) for code in query.codes})
+
+@router.get("/changes", response_model=dict, name="获取权限增量变更")
+async def get_permission_changes(
+    since: int = Query(0, ge=0),
+    current_user = Depends(get_current_active_user)
+):
+    """获取指定版本之后新增、修改、删除的权限节点，版本过旧时返回完整快照"""
+    changes = await permission_change_log.get_changes(since)
+    return ResponseModel.success(changes)
+
 @router.get("/stats", response_model=dict, name="获取权限统计数据")
 async def get_permission_stats(current_user = Depends(get_current_active_user)):
     """获取权限统计数据"""
     stats = await PermissionService.get_permission_stats()
     return ResponseModel.success(stats)
 
+@router.get("/{permission_id}/subtree", response_model=dict, name="获取权限子树")
+async def get_permission_subtree(
+    permission_id: int = Path(..., ge=1),
+    current_user = Depends(get_current_active_user)
+):
+    """获取权限及其全部下级组成的子树"""
+    subtree = await PermissionService.get_subtree(permission_id)
+    return ResponseModel.success(subtree)
+
+@router.get("/{permission_id}/ancestors", response_model=dict, name="获取权限祖先链")
+async def get_permission_ancestors(
+    permission_id: int = Path(..., ge=1),
+    current_user = Depends(get_current_active_user)
+):
+    """获取权限的祖先链（从根节点到直接上级）"""
+    ancestors = await PermissionService.get_ancestors(permission_id)
+    return ResponseModel.success(ancestors)
+
+@router.get("/{permission_id}/breadcrumb", response_model=dict, name="获取权限面包屑")
+async def get_permission_breadcrumb(
+    permission_id: int = Path(..., ge=1),
+    current_user = Depends(get_current_active_user)
+):
+    """获取面包屑导航（从根节点到当前权限）"""
+    breadcrumb = await PermissionService.get_breadcrumb(permission_id)
+    return ResponseModel.success(breadcrumb)
+
 @router.get("/{permission_id}", response_model=dict, name="获取权限详情")
 async def get_permission(
     permission_id: int = Path(..., ge=1),
@@ -81,6 +159,7 @@ async def get_permission(
 async def update_permission(
     permission_data: PermissionUpdate,
     permission_id: int = Path(..., ge=1),
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -91,6 +170,7 @@ async def update_permission(
 @router.delete("/{permission_id}", response_model=dict, name="删除权限")
 async def delete_permission(
     permission_id: int = Path(..., ge=1),
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -104,8 +184,8 @@ async def validate_menu_path(
     current_user = Depends(get_current_active_user)
 ):
     """验证菜单路径是否存在"""
-    # 验证逻辑...
-    return ResponseModel.success(True)  # 或者 False
+    status = await PermissionService.get_menu_status([path])
+    return ResponseModel.success(status[path]["exists"])
 
 @router.get("/menu/check-disabled", response_model=dict)
 async def check_menu_disabled(
@@ -113,20 +193,14 @@ async def check_menu_disabled(
     current_user = Depends(get_current_active_user)
 ):
     """检查菜单是否被禁用"""
-    # 查找匹配路径的菜单
-    menu = await PermissionService.filter(type="MENU", path=path).first()
-    
-    if not menu:
-        # 菜单不存在
-        return ResponseModel.success({
-            "exists": False,
-            "disabled": False,
-            "menuName": None
-        })
-    
-    # 返回菜单状态
-    return ResponseModel.success({
-        "exists": True,
-        "disabled": not menu.enable,
-        "menuName": menu.name
-    }) 
\ No newline at end of file
+    status = await PermissionService.get_menu_status([path])
+    return ResponseModel.success(status[path])
+
+@router.post("/menu/check", response_model=dict, name="批量检查菜单路径")
+async def check_menu_paths(
+    query: MenuPathBatchQuery,
+    current_user = Depends(get_current_active_user)
+):
+    """批量检查路由表中各路径对应菜单的状态（是否存在、是否禁用、菜单名称）"""
+    status = await PermissionService.get_menu_status(query.paths)
+    return ResponseModel.success(status)
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, Path, Query, Body, Request
 from app.schemas.role import RoleCreate, RoleUpdate, RolePermissionAdd, RoleQuery
 from app.services.role import RoleService
-from app.utils.response import ResponseModel
+from app.utils.response import ResponseModel, EncodedJSONResponse
 from app.utils.exceptions import CustomException, ErrorCode
-from app.utils.dependencies import get_current_active_user, check_roles, check_preview
+from app.utils.dependencies import get_current_active_user, check_roles, check_preview, admin_write_limit, role_tree_etag
+from app.utils.etag import etag_headers
 from typing import List, Optional, Dict, Any
 from app.models.role import Role
 
@@ -12,6 +13,7 @@ router = APIRouter()
 @router.post("", response_model=dict)
 async def create_role(
     role_data: RoleCreate,
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -26,9 +28,16 @@ async def get_roles(
     code: Optional[str] = None,
     name: Optional[str] = None,
     enable: Optional[bool] = None,
+    cursor: Optional[str] = Query(None, max_length=256),
+    totalMode: str = Query("exact", pattern="^(exact|estimate|none)$"),
     current_user = Depends(get_current_active_user)
 ):
-    """获取角色列表"""
+    """获取角色列表（传入 cursor 时使用游标分页，第一页传空字符串）"""
+    if cursor is not None:
+        # 与下方不分页的列表一致：enable=false 时不按启用状态过滤
+        result = await RoleService.get_roles(page, page_size, code, name, enable or None, cursor, totalMode)
+        return ResponseModel.success(result)
+    
     if enable is not None:
         query = Role.all()
         if enable:
@@ -46,7 +55,7 @@ async def get_roles(
         
         return ResponseModel.success(role_list)
     else:
-        result = await RoleService.get_roles(page, page_size, code, name, enable)
+        result = await RoleService.get_roles(page, page_size, code, name, enable, None, totalMode)
         return ResponseModel.success(result)
 
 @router.get("/page", response_model=dict)
@@ -56,17 +65,23 @@ async def get_roles_page(
     code: Optional[str] = None,
     name: Optional[str] = None,
     enable: Optional[bool] = None,
+    cursor: Optional[str] = Query(None, max_length=256),
+    totalMode: str = Query("exact", pattern="^(exact|estimate|none)$"),
     current_user = Depends(get_current_active_user)
 ):
-    """获取角色列表（兼容前端 pageNo 和 pageSize 参数）"""
-    result = await RoleService.get_roles_with_permissions(pageNo, pageSize, code, name, enable)
+    """获取角色列表（兼容前端 pageNo 和 pageSize 参数，传入 cursor 时使用游标分页）"""
+    result = await RoleService.get_roles_with_permissions(pageNo, pageSize, code, name, enable, cursor, totalMode)
     return ResponseModel.success(result)
 
 @router.get("/permissions/tree", response_model=dict)
-async def get_role_permissions_tree(current_user = Depends(get_current_active_user)):
+async def get_role_permissions_tree(
+    current_user = Depends(get_current_active_user),
+    etag: str = Depends(role_tree_etag)
+):
     """获取角色权限树"""
-    tree = await RoleService.get_role_permissions_tree(current_user)
-    return ResponseModel.success(tree)
+    return EncodedJSONResponse(
+        await RoleService.get_encoded_role_permissions_tree(current_user), headers=etag_headers(etag)
+    )
 
 @router.get("/permissions/by-role", response_model=dict)
 async def get_role_permissions_by_id(
@@ -105,6 +120,7 @@ async def get_role(
 async def update_role(
     role_data: RoleUpdate,
     role_id: int = Path(..., ge=1),
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -115,6 +131,7 @@ async def update_role(
 @router.delete("/{role_id}", response_model=dict)
 async def delete_role(
     role_id: int = Path(..., ge=1),
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -135,6 +152,7 @@ async def get_role_permissions(
 async def add_role_permissions(
     permission_data: RolePermissionAdd,
     role_id: int = Path(..., ge=1),
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -146,6 +164,7 @@ async def add_role_permissions(
 async def set_role_permissions(
     request: Request,
     role_id: int = Path(..., ge=1),
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
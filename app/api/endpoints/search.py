@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Query
+from app.services.search import SearchService
+from app.utils.response import ResponseModel
+from app.utils.dependencies import check_roles
+
+router = APIRouter()
+
+@router.get("", response_model=dict)
+async def search(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=50),
+    current_user = Depends(check_roles(["SUPER_ADMIN", "SYS_ADMIN"]))
+):
+    """按名称或编码搜索用户、角色和权限（仅管理员，结果包含全部用户名、角色和权限编码）"""
+    result = await SearchService.search(q, limit)
+    return ResponseModel.success(result)
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, Path, Query, Request
+from fastapi import APIRouter, Depends, Path, Query, Request, Response
 from app.schemas.user import (
     UserCreate, UserUpdate, ProfileUpdate, 
     PasswordReset, UserRoleAdd, UserQuery, UserDetail
 )
 from app.services.user import UserService
+from app.services.authz import AuthzService
 from app.utils.response import ResponseModel
 from app.utils.exceptions import CustomException, ErrorCode
-from app.utils.dependencies import get_current_active_user, check_roles, check_preview
+from app.utils.dependencies import get_current_active_user, check_roles, check_preview, admin_write_limit, user_detail_etag
+from app.utils.etag import etag_headers
 from typing import List, Optional
 
 router = APIRouter()
@@ -14,6 +16,7 @@ router = APIRouter()
 @router.post("", response_model=dict)
 async def create_user(
     user_data: UserCreate,
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -28,19 +31,22 @@ async def get_users(
     page_size: int = Query(10, ge=1, le=100, alias="pageSize"),
     username: Optional[str] = None,
     enable: Optional[bool] = None,
+    cursor: Optional[str] = Query(None, max_length=256),
+    totalMode: str = Query("exact", pattern="^(exact|estimate|none)$"),
     current_user = Depends(get_current_active_user)
 ):
-    """获取用户列表"""
+    """获取用户列表（传入 cursor 时使用游标分页，第一页传空字符串）"""
     # 检查是否使用了 pageNo 和 pageSize 参数
     if "pageNo" in request.query_params or "pageSize" in request.query_params:
-        result = await UserService.get_users_with_details(page, page_size, username, enable)
+        result = await UserService.get_users_with_details(page, page_size, username, enable, cursor, totalMode)
     else:
-        result = await UserService.get_users(page, page_size, username, enable)
+        result = await UserService.get_users(page, page_size, username, enable, cursor, totalMode)
     return ResponseModel.success(result)
 
 @router.delete("/{user_id}", response_model=dict)
 async def delete_user(
     user_id: int = Path(..., ge=1),
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -56,6 +62,7 @@ async def delete_user(
 async def update_user(
     user_data: UserUpdate,
     user_id: int = Path(..., ge=1),
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN", "SYS_ADMIN"]))
 ):
@@ -79,9 +86,14 @@ async def update_profile(
     return ResponseModel.success(profile)
 
 @router.get("/detail")
-async def get_user_info(current_user = Depends(get_current_active_user)):
+async def get_user_info(
+    response: Response,
+    current_user = Depends(get_current_active_user),
+    etag: str = Depends(user_detail_etag)
+):
     """获取当前用户详情"""
     user_detail = await UserService.get_user_detail(current_user.id)
+    response.headers.update(etag_headers(etag))
     return ResponseModel.success(user_detail)
 
 @router.get("/{username}", response_model=dict)
@@ -105,10 +117,9 @@ async def get_user_profile(
     # 只能本人或超管查询
     if current_user.id != user_id:
         # 检查是否为超管
-        user_roles = await UserService.get_user_roles(current_user.id)
-        is_super_admin = any(role.code == "SUPER_ADMIN" for role in user_roles)
+        snapshot = await AuthzService.get_snapshot(current_user.id)
         
-        if not is_super_admin:
+        if not snapshot.is_super_admin:
             raise CustomException(ErrorCode.ERR_11003)
     
     profile = await UserService.get_user_profile(user_id)
@@ -118,6 +129,7 @@ async def get_user_profile(
 async def add_user_roles(
     role_data: UserRoleAdd,
     user_id: int = Path(..., ge=1),
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -129,6 +141,7 @@ async def add_user_roles(
 async def reset_password(
     password_data: PasswordReset,
     user_id: int = Path(..., ge=1),
+    _limit: bool = Depends(admin_write_limit),
     _: bool = Depends(check_preview),
     current_user = Depends(check_roles(["SUPER_ADMIN"]))
 ):
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """带过期时间的进程内 LRU 缓存"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取缓存，过期或不存在时返回默认值"""
+        item = self._data.get(key, _MISSING)
+        if item is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """写入缓存，ttl 为空时使用默认过期时间"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """删除缓存"""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """清空缓存"""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率统计"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class CacheBus:
+    """缓存失效通知
+
+    多进程部署时每个进程都持有自己的本地缓存，数据变更时通过 Redis 发布订阅广播失效消息，
+    各进程收到后清理本地缓存。消息处理函数需保证幂等，发布方本进程也会收到自己的消息。
+
+    发布订阅不保证送达，订阅断开期间的消息会丢失。每次订阅成功（包括断线重连）后执行
+    on_connect 注册的回调，从 Redis 重新同步版本号等状态，补上可能错过的消息。
+    """
+
+    CHANNEL = "cache:invalidate"
+
+    def __init__(self):
+        self.handlers: Dict[str, List[Callable[[Any], None]]] = {}
+        self.connect_hooks: List[Callable[[], Awaitable[Any]]] = []
+        self.task: Optional[asyncio.Task] = None
+
+    def register(self, topic: str, handler: Callable[[Any], None]):
+        """注册消息处理函数"""
+        self.handlers.setdefault(topic, []).append(handler)
+
+    def on_connect(self, hook: Callable[[], Awaitable[Any]]):
+        """注册订阅成功后执行的回调"""
+        self.connect_hooks.append(hook)
+
+    def dispatch(self, topic: str, data: Any):
+        """在本进程内处理消息"""
+        for handler in self.handlers.get(topic, []):
+            try:
+                handler(data)
+            except Exception as e:
+                logger.error(f"处理缓存失效消息失败 [{topic}]: {e}")
+
+    async def publish(self, topic: str, data: Any = None):
+        """本进程立即处理，并广播给其他进程"""
+        self.dispatch(topic, data)
+        try:
+            await redis_client.publish(self.CHANNEL, json.dumps({"topic": topic, "data": data}))
+        except Exception as e:
+            logger.warning(f"广播缓存失效消息失败 [{topic}]: {e}")
+
+    async def _listen(self):
+        """订阅失效消息，连接断开后自动重连"""
+        while True:
+            pubsub = None
+            try:
+                pubsub = redis_client.pubsub()
+                await pubsub.subscribe(self.CHANNEL)
+                # 订阅成功后再同步，同步之后的变更都能通过订阅收到
+                for hook in self.connect_hooks:
+                    try:
+                        await hook()
+                    except Exception as e:
+                        logger.warning(f"订阅后同步状态失败: {e}")
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    payload = json.loads(message["data"])
+                    self.dispatch(payload["topic"], payload.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"缓存失效订阅中断，稍后重试: {e}")
+                await asyncio.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+    def start(self):
+        """启动订阅"""
+        if self.task is None:
+            self.task = asyncio.create_task(self._listen())
+            logger.info("缓存失效订阅已启动")
+
+    async def stop(self):
+        """停止订阅"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+            logger.info("缓存失效订阅已停止")
+
+
+# 创建缓存失效通知实例
+cache_bus = CacheBus()
@@ -0,0 +1,110 @@
+import asyncio
+import base64
+import logging
+import secrets
+import string
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from captcha.image import ImageCaptcha
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CAPTCHA_CHARS = string.ascii_uppercase + string.digits
+
+# 每个渲染线程复用一个 ImageCaptcha 实例，避免重复加载字体
+_local = threading.local()
+
+
+def _render() -> Tuple[str, str]:
+    """渲染一张验证码图片，返回验证码文本与 base64 图片"""
+    image = getattr(_local, "image", None)
+    if image is None:
+        image = _local.image = ImageCaptcha(width=160, height=60)
+
+    text = "".join(secrets.choice(CAPTCHA_CHARS) for _ in range(4))
+    data = image.generate(text).getvalue()
+    return text, base64.b64encode(data).decode("utf-8")
+
+
+class CaptchaPool:
+    """预渲染验证码池
+
+    验证码图片渲染耗时几十毫秒，放在请求中同步执行会阻塞事件循环。
+    这里由后台线程池持续预渲染并放入队列，请求时直接取用；队列为空时才临时渲染。
+    """
+
+    def __init__(self):
+        self.size = max(1, settings.CAPTCHA_POOL_SIZE)
+        self.workers = max(1, settings.CAPTCHA_WORKERS)
+        self.queue: Optional[asyncio.Queue] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.tasks: List[asyncio.Task] = []
+        self.hits = 0
+        self.misses = 0
+
+    async def _refill(self):
+        """后台补充验证码，队列满时阻塞等待"""
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                item = await loop.run_in_executor(self.executor, _render)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"预渲染验证码失败: {e}")
+                await asyncio.sleep(1)
+                continue
+            await self.queue.put(item)
+
+    def start(self):
+        """启动后台渲染"""
+        if self.executor is None:
+            self.queue = asyncio.Queue(maxsize=self.size)
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="captcha")
+            self.tasks = [asyncio.create_task(self._refill()) for _ in range(self.workers)]
+            logger.info(f"验证码池已启动，容量: {self.size}，渲染线程数: {self.workers}")
+
+    async def stop(self):
+        """停止后台渲染"""
+        for task in self.tasks:
+            task.cancel()
+        for task in self.tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self.tasks = []
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    async def acquire(self) -> Tuple[str, str]:
+        """取出一张验证码，返回验证码文本与 base64 图片"""
+        if self.queue is not None:
+            try:
+                item = self.queue.get_nowait()
+                self.hits += 1
+                return item
+            except asyncio.QueueEmpty:
+                pass
+
+        # 池为空（启动初期或突发流量），在线程池中临时渲染
+        self.misses += 1
+        return await asyncio.get_running_loop().run_in_executor(self.executor, _render)
+
+    def metrics(self) -> Dict[str, Any]:
+        """运行指标"""
+        return {
+            "size": self.size,
+            "available": self.queue.qsize() if self.queue is not None else 0,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 创建验证码池实例
+captcha_pool = CaptchaPool()
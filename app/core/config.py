@@ -23,7 +23,70 @@ class Settings(BaseSettings):
     # JWT配置
     JWT_SECRET: str = os.getenv("JWT_SECRET", "d0!doc15415B0*4G0`")
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1440))
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))
+    # 令牌验证缓存容量
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+    # 令牌吊销列表配置
+    REVOCATION_SYNC_INTERVAL: int = int(os.getenv("REVOCATION_SYNC_INTERVAL", 30))
+    REVOCATION_BLOOM_CAPACITY: int = int(os.getenv("REVOCATION_BLOOM_CAPACITY", 100000))
+    REVOCATION_BLOOM_ERROR_RATE: float = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", 0.001))
+
+    # 密码哈希算法配置：逗号分隔，第一个为新密码使用的算法，其余算法的旧哈希在登录时自动升级
+    PASSWORD_SCHEMES: str = os.getenv("PASSWORD_SCHEMES", "bcrypt")
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", 12))
+    ARGON2_TIME_COST: int = int(os.getenv("ARGON2_TIME_COST", 3))
+    ARGON2_MEMORY_COST: int = int(os.getenv("ARGON2_MEMORY_COST", 65536))
+    ARGON2_PARALLELISM: int = int(os.getenv("ARGON2_PARALLELISM", 4))
+    SCRYPT_ROUNDS: int = int(os.getenv("SCRYPT_ROUNDS", 16))
+    SCRYPT_BLOCK_SIZE: int = int(os.getenv("SCRYPT_BLOCK_SIZE", 8))
+    SCRYPT_PARALLELISM: int = int(os.getenv("SCRYPT_PARALLELISM", 1))
+
+    # 密码哈希进程池配置
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+    PASSWORD_HASH_QUEUE_SIZE: int = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 64))
+    PASSWORD_HASH_TIMEOUT: float = float(os.getenv("PASSWORD_HASH_TIMEOUT", 5))
+
+    # 当前用户缓存配置（本地缓存 + Redis）
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+    PRINCIPAL_CACHE_TTL: int = int(os.getenv("PRINCIPAL_CACHE_TTL", 60))
+    PRINCIPAL_REDIS_TTL: int = int(os.getenv("PRINCIPAL_REDIS_TTL", 600))
+
+    # 用户授权快照缓存配置
+    AUTHZ_CACHE_SIZE: int = int(os.getenv("AUTHZ_CACHE_SIZE", 10000))
+    AUTHZ_CACHE_TTL: int = int(os.getenv("AUTHZ_CACHE_TTL", 300))
+    AUTHZ_REDIS_TTL: int = int(os.getenv("AUTHZ_REDIS_TTL", 3600))
+
+    # 权限表快照缓存配置（秒），版本号变化时立即失效，超过该时长也会重新加载
+    PERMISSION_CACHE_TTL: int = int(os.getenv("PERMISSION_CACHE_TTL", 300))
+    # 权限变更日志保留条数，早于保留范围的增量请求返回完整快照
+    PERMISSION_CHANGES_RETENTION: int = int(os.getenv("PERMISSION_CHANGES_RETENTION", 1000))
+    # 统计计数器对账间隔（秒）
+    STATS_RECONCILE_INTERVAL: int = int(os.getenv("STATS_RECONCILE_INTERVAL", 600))
+    # 按角色组合缓存的权限树数量
+    ROLE_TREE_CACHE_SIZE: int = int(os.getenv("ROLE_TREE_CACHE_SIZE", 256))
+    # 按角色组合缓存的权限位图数量
+    PERMISSION_BITS_CACHE_SIZE: int = int(os.getenv("PERMISSION_BITS_CACHE_SIZE", 1024))
+    # 分页列表总数缓存，表数据增删改时立即失效
+    LIST_COUNT_CACHE_SIZE: int = int(os.getenv("LIST_COUNT_CACHE_SIZE", 1024))
+    LIST_COUNT_CACHE_TTL: int = int(os.getenv("LIST_COUNT_CACHE_TTL", 30))
+    # 进程内搜索索引：是否启用、全量重建间隔（秒）
+    SEARCH_INDEX_ENABLED: bool = os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true"
+    SEARCH_INDEX_REBUILD_INTERVAL: int = int(os.getenv("SEARCH_INDEX_REBUILD_INTERVAL", 3600))
+    
+    # 验证码配置
+    CAPTCHA_POOL_SIZE: int = int(os.getenv("CAPTCHA_POOL_SIZE", 200))
+    CAPTCHA_WORKERS: int = int(os.getenv("CAPTCHA_WORKERS", 2))
+    CAPTCHA_TTL: int = int(os.getenv("CAPTCHA_TTL", 300))
+    
+    # 限流配置，格式为 "次数/秒数"
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_LOGIN_IP: str = os.getenv("RATE_LIMIT_LOGIN_IP", "30/60")
+    RATE_LIMIT_LOGIN_USERNAME: str = os.getenv("RATE_LIMIT_LOGIN_USERNAME", "5/60")
+    RATE_LIMIT_REGISTER_IP: str = os.getenv("RATE_LIMIT_REGISTER_IP", "10/3600")
+    RATE_LIMIT_REFRESH_IP: str = os.getenv("RATE_LIMIT_REFRESH_IP", "60/60")
+    RATE_LIMIT_PASSWORD_TOKEN: str = os.getenv("RATE_LIMIT_PASSWORD_TOKEN", "5/300")
+    RATE_LIMIT_ADMIN_WRITE_TOKEN: str = os.getenv("RATE_LIMIT_ADMIN_WRITE_TOKEN", "60/60")
     
     # 是否预览环境
     # IS_PREVIEW: bool = os.getenv("IS_PREVIEW", "false").lower() == "true"
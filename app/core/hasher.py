@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import status
+
+from app.core import security
+from app.core.config import settings
+from app.utils.exceptions import CustomException, ErrorCode
+
+logger = logging.getLogger(__name__)
+
+
+def _timed_call(func: Callable, *args):
+    """在工作进程中执行哈希函数，并返回结果与纯计算耗时"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _warmup():
+    """预热工作进程（子进程启动时已完成模块导入）"""
+    return None
+
+
+class _Timing:
+    """耗时统计"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class PasswordHasher:
+    """异步密码哈希服务
+
+    bcrypt 属于 CPU 密集型计算，直接在事件循环中执行会阻塞其他请求。
+    这里把计算提交到有界进程池中，超出队列深度的请求直接拒绝，避免登录高峰拖垮整个服务。
+    """
+
+    def __init__(self):
+        self.workers = max(1, settings.PASSWORD_HASH_WORKERS)
+        self.queue_size = max(0, settings.PASSWORD_HASH_QUEUE_SIZE)
+        self.timeout = settings.PASSWORD_HASH_TIMEOUT
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # 已提交且尚未结束的任务数，任务在工作进程中结束后才减少（超时不会中止工作进程中的任务）
+        self.pending = 0
+        self._pending_lock = threading.Lock()
+        self.rejected = 0
+        self.timeouts = 0
+        self.queue_wait = _Timing()
+        self.hash_time = _Timing()
+
+    def start(self):
+        """启动进程池"""
+        if self.executor is None:
+            # 使用 spawn 方式创建子进程，避免 fork 继承事件循环及连接状态
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            # 提前拉起全部工作进程，避免首批登录请求承担进程启动耗时而超时
+            for _ in range(self.workers):
+                self.executor.submit(_warmup)
+            logger.info(f"密码哈希进程池已启动，进程数: {self.workers}，队列深度: {self.queue_size}")
+
+    def shutdown(self):
+        """关闭进程池"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            logger.info("密码哈希进程池已关闭")
+
+    def _release(self, _future=None):
+        with self._pending_lock:
+            self.pending -= 1
+
+    async def _submit(self, func: Callable, *args):
+        """提交任务到进程池，并统计排队与计算耗时"""
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise CustomException(
+                error_code=ErrorCode.ERR_10006,
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        self.start()
+        with self._pending_lock:
+            self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            executor_future = self.executor.submit(_timed_call, func, *args)
+        except BaseException:
+            self._release()
+            raise
+        # 在进程池的回调线程中执行，任务完成、失败或被取消时才释放名额
+        executor_future.add_done_callback(self._release)
+        try:
+            result, elapsed = await asyncio.wait_for(asyncio.wrap_future(executor_future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"密码哈希任务超时（{self.timeout}s），当前排队任务数: {self.pending}")
+            raise CustomException(
+                error_code=ErrorCode.ERR_10006,
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        total = time.perf_counter() - submitted
+        self.hash_time.add(elapsed)
+        self.queue_wait.add(max(0.0, total - elapsed))
+        return result
+
+    async def hash(self, password: str) -> str:
+        """计算密码哈希"""
+        return await self._submit(security.get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """验证密码"""
+        return await self._submit(security.verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """验证密码，哈希参数过时则同时返回新哈希"""
+        return await self._submit(security.verify_and_update_password, plain_password, hashed_password)
+
+    def metrics(self) -> Dict[str, Any]:
+        """运行指标"""
+        return {
+            "workers": self.workers,
+            "queueSize": self.queue_size,
+            "pending": self.pending,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "queueWait": self.queue_wait.to_dict(),
+            "hashTime": self.hash_time.to_dict(),
+        }
+
+
+# 创建密码哈希服务实例
+password_hasher = PasswordHasher()
@@ -0,0 +1,204 @@
+import hashlib
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import Request, status
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.redis import redis_client
+from app.utils.exceptions import CustomException, ErrorCode
+
+logger = logging.getLogger(__name__)
+
+# 滑动窗口限流脚本：所有键都未超限时才记录本次请求，保证多个维度的限流原子生效
+# KEYS: 限流键；ARGV: 当前时间(ms)、请求标识，以及每个键对应的 窗口(ms)、次数上限
+# 返回每个键需要等待的毫秒数，全部为 0 表示放行
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+local waits = {}
+local rejected = false
+for i, key in ipairs(KEYS) do
+    local window = tonumber(ARGV[1 + i * 2])
+    local limit = tonumber(ARGV[2 + i * 2])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    waits[i] = 0
+    if redis.call('ZCARD', key) >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        waits[i] = window
+        if oldest[2] then
+            waits[i] = math.max(1, tonumber(oldest[2]) + window - now)
+        end
+        rejected = true
+    end
+end
+if not rejected then
+    for i, key in ipairs(KEYS) do
+        redis.call('ZADD', key, now, member)
+        redis.call('PEXPIRE', key, tonumber(ARGV[1 + i * 2]))
+    end
+end
+return waits
+"""
+
+
+def parse_rule(rule: str) -> Tuple[int, int]:
+    """解析限流规则，格式为 "次数/秒数"，如 "10/60" """
+    limit, window = rule.split("/", 1)
+    return int(limit), int(window)
+
+
+class RateLimiter:
+    """限流器
+
+    以 Redis 滑动窗口为准，多进程共享计数；每个进程另外维护本地令牌桶作为快速路径：
+    本地令牌桶耗尽或 Redis 已判定超限且仍在等待期内时，直接拒绝而不访问 Redis。
+    """
+
+    def __init__(self):
+        self.script = None
+        # 本地令牌桶：限流键 -> [剩余令牌, 上次更新时间]
+        self.buckets = LRUCache(maxsize=100000)
+        # 本地封禁：限流键 -> 解封时间
+        self.blocked = LRUCache(maxsize=100000)
+        self.local_rejected = 0
+        self.redis_rejected = 0
+
+    def _refill(self, key: str, limit: int, window: int, now: float) -> List[float]:
+        """读取本地令牌桶并按经过的时间补充令牌"""
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            return [float(limit), now]
+        bucket[0] = min(float(limit), bucket[0] + (now - bucket[1]) * limit / window)
+        bucket[1] = now
+        return bucket
+
+    def _take_tokens(self, rules: List[Tuple[str, int, int]]) -> Optional[float]:
+        """从各维度的本地令牌桶各取一个令牌
+
+        先检查全部令牌桶，都有令牌时才同时扣减，被某个维度拒绝的请求不消耗其他维度的令牌。
+        放行时返回 None，否则返回建议的重试等待秒数。
+        """
+        now = time.monotonic()
+        buckets = [self._refill(key, limit, window, now) for key, limit, window in rules]
+        retry_after = max(
+            (window / limit for (_, limit, window), bucket in zip(rules, buckets) if bucket[0] < 1),
+            default=None
+        )
+        for (key, _, window), bucket in zip(rules, buckets):
+            if retry_after is None:
+                bucket[0] -= 1
+            self.buckets.set(key, bucket, ttl=window)
+        return retry_after
+
+    def _reject(self, retry_after: float):
+        raise CustomException(
+            error_code=ErrorCode.ERR_10007,
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
+        )
+
+    async def hit(self, rules: List[Tuple[str, int, int]]):
+        """记录一次请求，任一维度超限时抛出 429 异常
+
+        rules: [(限流键, 次数上限, 窗口秒数), ...]
+        """
+        if not rules:
+            return
+
+        now = time.monotonic()
+        for key, limit, window in rules:
+            until = self.blocked.get(key)
+            if until is not None and until > now:
+                self.local_rejected += 1
+                self._reject(until - now)
+
+        retry_after = self._take_tokens(rules)
+        if retry_after is not None:
+            self.local_rejected += 1
+            self._reject(retry_after)
+
+        try:
+            if self.script is None:
+                self.script = redis_client.client.register_script(SLIDING_WINDOW_SCRIPT)
+            args: List[Any] = [int(time.time() * 1000), uuid.uuid4().hex]
+            for _, limit, window in rules:
+                args.extend([window * 1000, limit])
+            waits = await self.script(keys=[key for key, _, _ in rules], args=args)
+        except Exception as e:
+            # Redis 不可用时仅依赖本地令牌桶，不阻断正常请求
+            logger.warning(f"限流检查失败: {e}")
+            return
+
+        retry_after = 0.0
+        for (key, _, _), wait_ms in zip(rules, waits):
+            wait = int(wait_ms) / 1000
+            if wait > 0:
+                # 只封禁超限的维度，等待期内直接在本地拒绝
+                self.blocked.set(key, now + wait, ttl=wait)
+                retry_after = max(retry_after, wait)
+
+        if retry_after > 0:
+            self.redis_rejected += 1
+            self._reject(retry_after)
+
+    def metrics(self) -> Dict[str, Any]:
+        """运行指标"""
+        return {
+            "localRejected": self.local_rejected,
+            "redisRejected": self.redis_rejected,
+            "trackedKeys": len(self.buckets),
+        }
+
+
+# 创建限流器实例
+rate_limiter = RateLimiter()
+
+
+async def _rate_limit_key(request: Request, key_by: str) -> Optional[str]:
+    """提取限流维度的值，无法提取时返回 None 跳过该维度"""
+    if key_by == "ip":
+        return request.client.host if request.client else "unknown"
+
+    if key_by == "token":
+        authorization = request.headers.get("Authorization")
+        if not authorization:
+            return None
+        return hashlib.sha256(authorization.encode()).hexdigest()[:32]
+
+    if key_by == "username":
+        try:
+            body = await request.json()
+        except Exception:
+            return None
+        username = body.get("username") if isinstance(body, dict) else None
+        return str(username).lower() if username else None
+
+    raise ValueError(f"不支持的限流维度: {key_by}")
+
+
+def rate_limit(scope: str, **rules: str):
+    """限流依赖
+
+    用法: Depends(rate_limit("login", ip="20/60", username="5/60"))
+    支持的维度: ip、username（请求体中的 username）、token（Authorization 请求头）
+    """
+    parsed = [(key_by, *parse_rule(rule)) for key_by, rule in rules.items() if rule]
+
+    async def _rate_limit(request: Request):
+        if not settings.RATE_LIMIT_ENABLED:
+            return True
+
+        hits = []
+        for key_by, limit, window in parsed:
+            value = await _rate_limit_key(request, key_by)
+            if value is not None:
+                hits.append((f"ratelimit:{scope}:{key_by}:{value}", limit, window))
+
+        await rate_limiter.hit(hits)
+        return True
+
+    return _rate_limit
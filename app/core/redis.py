@@ -24,16 +24,18 @@ class RedisClient:
             await self.client.close()
             logger.info("Redis连接已关闭")
     
-    async def set(self, key: str, value: str, expire: int = None):
-        """设置键值对"""
-        await self.client.set(key, value)
-        if expire:
-            await self.client.expire(key, expire)
+    async def set(self, key: str, value: str, expire: int = None, nx: bool = False):
+        """设置键值对，nx 为 True 时仅在键不存在时设置，返回是否设置成功"""
+        return await self.client.set(key, value, ex=expire or None, nx=nx)
     
     async def get(self, key: str):
         """获取值"""
         return await self.client.get(key)
     
+    async def getdel(self, key: str):
+        """获取值并删除"""
+        return await self.client.getdel(key)
+    
     async def delete(self, key: str):
         """删除键"""
         await self.client.delete(key)
@@ -41,6 +43,18 @@ class RedisClient:
     async def exists(self, key: str):
         """检查键是否存在"""
         return await self.client.exists(key)
+    
+    async def incr(self, key: str) -> int:
+        """自增计数"""
+        return await self.client.incr(key)
+    
+    async def publish(self, channel: str, message: str):
+        """发布消息"""
+        return await self.client.publish(channel, message)
+    
+    def pubsub(self):
+        """创建发布订阅对象"""
+        return self.client.pubsub()
 
 # 创建Redis客户端实例
 redis_client = RedisClient() 
\ No newline at end of file
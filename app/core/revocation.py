@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.bloom import BloomFilter
+from app.core.cache import cache_bus
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class TokenRevocationStore:
+    """令牌吊销存储
+
+    Redis 中保存两类吊销记录：
+    - revoked:tokens  有序集合，成员为令牌ID(jti)，分值为令牌过期时间，用于单个令牌登出；
+    - revoked:users   哈希表，用户ID -> 吊销时间，该时间之前签发的令牌全部失效（修改密码等）。
+
+    本地布隆过滤器定期从 Redis 全量同步，吊销时通过缓存失效通知即时追加。
+    鉴权时只有布隆过滤器判断"可能已吊销"才访问 Redis 确认，绝大多数请求不产生网络开销。
+    """
+
+    TOKENS_KEY = "revoked:tokens"
+    USERS_KEY = "revoked:users"
+
+    def __init__(self):
+        self.bloom = BloomFilter(settings.REVOCATION_BLOOM_CAPACITY, settings.REVOCATION_BLOOM_ERROR_RATE)
+        self.task: Optional[asyncio.Task] = None
+        self.syncing = False
+        self.recent: List[str] = []
+        self.probable_hits = 0
+        self.confirmed_hits = 0
+        self.last_sync: Optional[float] = None
+
+    @staticmethod
+    def _token_member(jti: str) -> str:
+        return f"t:{jti}"
+
+    @staticmethod
+    def _user_member(user_id) -> str:
+        return f"u:{user_id}"
+
+    def _add_local(self, member: str):
+        """追加到本地布隆过滤器"""
+        self.bloom.add(member)
+        if self.syncing:
+            self.recent.append(member)
+
+    async def sync(self):
+        """从 Redis 全量重建布隆过滤器，并清理过期的吊销记录"""
+        now = time.time()
+        user_expire_before = now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+        self.syncing = True
+        self.recent = []
+        try:
+            client = redis_client.client
+            await client.zremrangebyscore(self.TOKENS_KEY, "-inf", now)
+            tokens = await client.zrange(self.TOKENS_KEY, 0, -1)
+            users = await client.hgetall(self.USERS_KEY)
+
+            # 吊销时间早于令牌最长有效期的用户记录已无意义
+            expired_users = [uid for uid, epoch in users.items() if float(epoch) < user_expire_before]
+            if expired_users:
+                await client.hdel(self.USERS_KEY, *expired_users)
+
+            capacity = max(settings.REVOCATION_BLOOM_CAPACITY, (len(tokens) + len(users)) * 2)
+            bloom = BloomFilter(capacity, settings.REVOCATION_BLOOM_ERROR_RATE)
+            for jti in tokens:
+                bloom.add(self._token_member(jti.decode() if isinstance(jti, bytes) else jti))
+            for uid, epoch in users.items():
+                if float(epoch) >= user_expire_before:
+                    bloom.add(self._user_member(uid.decode() if isinstance(uid, bytes) else uid))
+
+            # 同步期间新增的吊销记录可能不在本次读取的数据中，重新追加
+            for member in self.recent:
+                bloom.add(member)
+            self.bloom = bloom
+            self.last_sync = now
+        finally:
+            self.syncing = False
+            self.recent = []
+
+    async def _sync_loop(self):
+        """定期同步"""
+        while True:
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"同步令牌吊销列表失败: {e}")
+            await asyncio.sleep(settings.REVOCATION_SYNC_INTERVAL)
+
+    def start(self):
+        """启动定期同步"""
+        if self.task is None:
+            self.task = asyncio.create_task(self._sync_loop())
+            logger.info("令牌吊销列表同步已启动")
+
+    async def stop(self):
+        """停止定期同步"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    async def revoke_token(self, jti: str, exp: float):
+        """吊销单个令牌"""
+        await redis_client.client.zadd(self.TOKENS_KEY, {jti: exp})
+        await cache_bus.publish("revocation", self._token_member(jti))
+
+    async def revoke_user(self, user_id: int):
+        """吊销用户当前时间之前签发的所有令牌"""
+        await redis_client.client.hset(self.USERS_KEY, str(user_id), repr(time.time()))
+        await cache_bus.publish("revocation", self._user_member(user_id))
+
+    async def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        """判断令牌是否已吊销"""
+        jti = claims.get("jti")
+        user_id = claims.get("sub")
+        check_token = jti is not None and self._token_member(jti) in self.bloom
+        check_user = user_id is not None and self._user_member(user_id) in self.bloom
+        if not check_token and not check_user:
+            return False
+
+        self.probable_hits += 1
+        try:
+            pipe = redis_client.client.pipeline(transaction=False)
+            pipe.zscore(self.TOKENS_KEY, jti or "")
+            pipe.hget(self.USERS_KEY, str(user_id))
+            token_score, user_epoch = await pipe.execute()
+        except Exception as e:
+            # 无法确认时按已吊销处理
+            logger.warning(f"查询令牌吊销状态失败: {e}")
+            return True
+
+        revoked = check_token and token_score is not None
+        if not revoked and check_user and user_epoch is not None:
+            revoked = float(claims.get("iat", 0)) <= float(user_epoch)
+
+        if revoked:
+            self.confirmed_hits += 1
+        return revoked
+
+    def metrics(self) -> Dict[str, Any]:
+        """运行指标"""
+        return {
+            "bloomEntries": self.bloom.count,
+            "bloomCapacity": self.bloom.capacity,
+            "probableHits": self.probable_hits,
+            "confirmedHits": self.confirmed_hits,
+            "falsePositives": self.probable_hits - self.confirmed_hits,
+            "lastSync": self.last_sync,
+        }
+
+
+# 创建令牌吊销存储实例
+revocation_store = TokenRevocationStore()
+
+# 其他进程吊销令牌后，即时追加到本进程的布隆过滤器
+cache_bus.register("revocation", revocation_store._add_local)
@@ -1,13 +1,68 @@
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from jose import jwt
+from jose.exceptions import ExpiredSignatureError
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.cache import LRUCache
+import hashlib
+import time
+import uuid
+
+def create_password_context(
+    schemes: Optional[List[str]] = None,
+    bcrypt_rounds: Optional[int] = None,
+    argon2_time_cost: Optional[int] = None,
+    argon2_memory_cost: Optional[int] = None,
+    argon2_parallelism: Optional[int] = None,
+    scrypt_rounds: Optional[int] = None,
+    scrypt_block_size: Optional[int] = None,
+    scrypt_parallelism: Optional[int] = None,
+) -> CryptContext:
+    """
+    创建密码上下文，未指定的参数使用配置文件中的值
+
+    第一个算法用于生成新哈希；其他算法的哈希以及成本参数与当前配置不一致的哈希
+    会被标记为需要更新，登录验证通过后自动重新哈希。
+    """
+    if schemes is None:
+        schemes = [scheme.strip() for scheme in settings.PASSWORD_SCHEMES.split(",") if scheme.strip()]
+
+    bcrypt_rounds = bcrypt_rounds or settings.BCRYPT_ROUNDS
+    argon2_time_cost = argon2_time_cost or settings.ARGON2_TIME_COST
+    scrypt_rounds = scrypt_rounds or settings.SCRYPT_ROUNDS
+
+    # 成本上下限都设为当前配置，成本被调高或调低的旧哈希都会触发重新哈希
+    options = {
+        "bcrypt__default_rounds": bcrypt_rounds,
+        "bcrypt__min_rounds": bcrypt_rounds,
+        "bcrypt__max_rounds": bcrypt_rounds,
+        "argon2__default_rounds": argon2_time_cost,
+        "argon2__min_rounds": argon2_time_cost,
+        "argon2__max_rounds": argon2_time_cost,
+        "argon2__memory_cost": argon2_memory_cost or settings.ARGON2_MEMORY_COST,
+        "argon2__parallelism": argon2_parallelism or settings.ARGON2_PARALLELISM,
+        "scrypt__default_rounds": scrypt_rounds,
+        "scrypt__min_rounds": scrypt_rounds,
+        "scrypt__max_rounds": scrypt_rounds,
+        "scrypt__block_size": scrypt_block_size or settings.SCRYPT_BLOCK_SIZE,
+        "scrypt__parallelism": scrypt_parallelism or settings.SCRYPT_PARALLELISM,
+    }
+    options = {key: value for key, value in options.items() if key.split("__")[0] in schemes}
+
+    return CryptContext(schemes=schemes, default=schemes[0], deprecated="auto", **options)
 
 # 密码上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = create_password_context()
 
-def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+# 令牌验证缓存：令牌摘要 -> 解码后的声明，缓存至令牌过期
+token_cache = LRUCache(maxsize=settings.TOKEN_CACHE_SIZE)
+
+def create_access_token(
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None
+) -> str:
     """
     创建JWT访问令牌
     """
@@ -16,16 +71,56 @@ def create_access_token(subject: Union[str, Any], expires_delta: Optional[timede
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    # jti 用于单个令牌吊销，iat 用于按用户批量吊销
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "iat": round(time.time(), 3),
+        "jti": uuid.uuid4().hex,
+    }
+    if claims:
+        to_encode.update(claims)
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+def decode_access_token(token: str) -> Dict[str, Any]:
+    """
+    解码并验证JWT访问令牌，验证失败时抛出 JWTError
+
+    同一令牌在有效期内会被反复使用，验证通过的声明按令牌摘要缓存到 exp 为止，
+    返回的声明字典为缓存共享对象，调用方不应修改。
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        if claims["exp"] > time.time():
+            return claims
+        token_cache.delete(key)
+        raise ExpiredSignatureError("Signature has expired.")
+
+    claims = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+
+    # 没有过期时间的令牌不缓存
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = exp - time.time()
+        if ttl > 0:
+            token_cache.set(key, claims, ttl=ttl)
+
+    return claims
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     验证密码
     """
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    验证密码，哈希算法或成本参数已过时则同时返回新哈希
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     """
     获取密码哈希
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Request, status
+from fastapi import Depends, FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
@@ -6,9 +6,25 @@ from app.api import api_router
 from app.core.config import settings
 from app.db.init_db import init_db, close_db
 from app.core.redis import redis_client
+from app.core.hasher import password_hasher
+from app.core.cache import cache_bus
+from app.core.security import token_cache
+from app.core.revocation import revocation_store
+from app.core.captcha import captcha_pool
+from app.core.ratelimit import rate_limiter
+from app.services.principal import principal_cache
+from app.services.authz import AuthzService, authz_cache
+from app.services.permission_cache import permission_cache
+from app.services.role import role_tree_cache
+from app.services.permission_closure import PermissionClosureService
+from app.services.stats import stats_counters
+from app.services.permission_bits import permission_bits_cache
+from app.services.list_count import list_counter
+from app.services.search import search_index, fulltext_filter
 from app.utils.exceptions import CustomException, ErrorCode
 from app.utils.response import ResponseModel
 from app.utils.middleware import RequestMiddleware
+from app.utils.dependencies import check_roles
 import logging
 from fastapi.encoders import jsonable_encoder
 import json
@@ -69,6 +85,7 @@ async def custom_exception_handler(request: Request, exc: CustomException):
             originUrl=request.url.path,
             status_code=exc.status_code
         ),
+        headers=exc.headers,
     )
 
 
@@ -110,9 +127,35 @@ async def startup_event():
     # 确保数据库已初始化
     logger.info("数据库初始化完成")
     
+    # 闭包表为空时根据权限表重建
+    await PermissionClosureService.ensure()
+    
+    # 读取列表过滤可用的全文索引
+    await fulltext_filter.load(Tortoise.get_connection("default"))
+    
     # 连接Redis
     await redis_client.connect()
     
+    # 启动缓存失效订阅
+    cache_bus.start()
+    await AuthzService.sync_version()
+    await permission_cache.sync_version()
+    
+    # 启动令牌吊销列表同步
+    revocation_store.start()
+    
+    # 启动统计计数器定期对账
+    stats_counters.start()
+    
+    # 后台加载搜索索引
+    search_index.start()
+    
+    # 启动密码哈希进程池
+    password_hasher.start()
+    
+    # 启动验证码预渲染
+    captcha_pool.start()
+    
     logger.info("应用程序启动完成")
 
 
@@ -125,9 +168,19 @@ async def shutdown_event():
     logger.info("关闭数据库连接...")
     await Tortoise.close_connections()
     
+    # 停止令牌吊销列表同步、统计计数器对账、搜索索引重建与缓存失效订阅
+    await revocation_store.stop()
+    await stats_counters.stop()
+    await search_index.stop()
+    await cache_bus.stop()
+    
     # 关闭Redis连接
     await redis_client.disconnect()
     
+    # 关闭密码哈希进程池与验证码预渲染
+    password_hasher.shutdown()
+    await captcha_pool.stop()
+    
     logger.info("应用程序已关闭")
 
 
@@ -141,3 +194,22 @@ async def root():
 async def health_check():
     """健康检查"""
     return {"status": "ok"}
+
+
+@app.get("/metrics")
+async def metrics(current_user = Depends(check_roles(["SUPER_ADMIN"]))):
+    """运行指标（包含缓存、限流、令牌吊销等内部状态，仅超级管理员可访问）"""
+    return {
+        "passwordHasher": password_hasher.metrics(),
+        "tokenCache": token_cache.stats(),
+        "tokenRevocation": revocation_store.metrics(),
+        "captchaPool": captcha_pool.metrics(),
+        "rateLimiter": rate_limiter.metrics(),
+        "principalCache": principal_cache.stats(),
+        "authzCache": authz_cache.stats(),
+        "permissionCache": permission_cache.metrics(),
+        "roleTreeCache": role_tree_cache.stats(),
+        "permissionBitsCache": permission_bits_cache.stats(),
+        "listCountCache": list_counter.stats(),
+        "searchIndex": search_index.metrics(),
+    }
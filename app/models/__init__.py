@@ -1,10 +1,10 @@
 from app.models.user import User, Profile, User_Pydantic, UserIn_Pydantic, Profile_Pydantic, ProfileIn_Pydantic
 from app.models.role import Role, Role_Pydantic, RoleIn_Pydantic
-from app.models.permission import Permission, Permission_Pydantic, PermissionIn_Pydantic
+from app.models.permission import Permission, PermissionClosure, Permission_Pydantic, PermissionIn_Pydantic
 
 __all__ = [
     # 用户与权限
     "User", "Profile", "User_Pydantic", "UserIn_Pydantic", "Profile_Pydantic", "ProfileIn_Pydantic",
     "Role", "Role_Pydantic", "RoleIn_Pydantic",
-    "Permission", "Permission_Pydantic", "PermissionIn_Pydantic",
+    "Permission", "PermissionClosure", "Permission_Pydantic", "PermissionIn_Pydantic",
 ] 
\ No newline at end of file
@@ -26,6 +26,18 @@ class Permission(models.Model):
     def __str__(self):
         return self.name
 
+class PermissionClosure(models.Model):
+    """权限闭包表模型：记录每个权限与其全部祖先（包括自身，depth=0）的关系"""
+    id = fields.IntField(pk=True)
+    ancestor_id = fields.IntField(source_field="ancestorId")
+    descendant_id = fields.IntField(source_field="descendantId")
+    depth = fields.IntField()
+    
+    class Meta:
+        table = "permission_closure"
+        unique_together = (("ancestor_id", "descendant_id"),)
+        indexes = (("descendant_id", "depth"),)
+
 # 创建Pydantic模型
 Permission_Pydantic = pydantic_model_creator(Permission, name="Permission")
 PermissionIn_Pydantic = pydantic_model_creator(Permission, name="PermissionIn", exclude_readonly=True) 
\ No newline at end of file
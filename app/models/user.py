@@ -2,6 +2,9 @@ from tortoise import fields, models
 from tortoise.contrib.pydantic import pydantic_model_creator
 from datetime import datetime
 
+# 默认头像：新建资料的默认值，没有资料记录的用户也使用该头像
+DEFAULT_AVATAR = "https://wpimg.wallstcn.com/f778738c-e4f8-4870-b634-56703b4acafe.gif?imageView2/1/w/80/h/80"
+
 class User(models.Model):
     """用户模型"""
     id = fields.IntField(pk=True)
@@ -23,6 +26,8 @@ class User(models.Model):
     class Meta:
         table = "user"
         ordering = ["id"]
+        # 用户列表游标分页按 (createTime, id) 定位
+        indexes = (("create_time", "id"),)
     
     def __str__(self):
         return self.username
@@ -31,7 +36,7 @@ class Profile(models.Model):
     """用户资料模型"""
     id = fields.IntField(pk=True)
     gender = fields.IntField(null=True)
-    avatar = fields.CharField(max_length=255, default="https://wpimg.wallstcn.com/f778738c-e4f8-4870-b634-56703b4acafe.gif?imageView2/1/w/80/h/80")
+    avatar = fields.CharField(max_length=255, default=DEFAULT_AVATAR)
     email = fields.CharField(max_length=255, null=True)
     phone = fields.CharField(max_length=20, null=True)
     nick_name = fields.CharField(max_length=10, null=True, source_field="nickName")
@@ -1,19 +1,21 @@
 from app.schemas.user import (
     UserCreate, UserUpdate, UserLogin, ProfileUpdate, 
     PasswordUpdate, PasswordReset, UserRoleAdd, UserQuery,
-    Token, UserDetail
+    Token, TokenRefresh, UserDetail, Principal, AuthzSnapshot
 )
 from app.schemas.role import (
     RoleCreate, RoleUpdate, RolePermissionAdd, RoleQuery, RoleDetail
 )
 from app.schemas.permission import (
-    PermissionCreate, PermissionUpdate, PermissionQuery, PermissionNode
+    PermissionCreate, PermissionUpdate, PermissionQuery, PermissionNode, ButtonBatchQuery,
+    MenuPathBatchQuery, PermissionCheckQuery
 )
 
 __all__ = [
     "UserCreate", "UserUpdate", "UserLogin", "ProfileUpdate", 
     "PasswordUpdate", "PasswordReset", "UserRoleAdd", "UserQuery",
-    "Token", "UserDetail",
+    "Token", "TokenRefresh", "UserDetail", "Principal", "AuthzSnapshot",
     "RoleCreate", "RoleUpdate", "RolePermissionAdd", "RoleQuery", "RoleDetail",
     "PermissionCreate", "PermissionUpdate", "PermissionQuery", "PermissionNode",
+    "ButtonBatchQuery", "MenuPathBatchQuery", "PermissionCheckQuery",
 ] 
\ No newline at end of file
@@ -44,6 +44,18 @@ class PermissionQuery(BaseModel):
     type: Optional[str] = None
     enable: Optional[bool] = None
 
+# 批量获取按钮权限请求
+class ButtonBatchQuery(BaseModel):
+    menuIds: List[int] = Field(..., min_length=1, max_length=500)
+
+# 批量检查菜单路径请求
+class MenuPathBatchQuery(BaseModel):
+    paths: List[str] = Field(..., min_length=1, max_length=1000)
+
+# 批量检查权限编码请求
+class PermissionCheckQuery(BaseModel):
+    codes: List[str] = Field(..., min_length=1, max_length=500)
+
 # 权限树节点
 class PermissionNode(BaseModel):
     id: int
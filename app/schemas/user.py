@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, ConfigDict, Field, EmailStr
 from typing import Optional, List, Any
 
 # 用户创建请求
@@ -14,9 +14,13 @@ class UserUpdate(BaseModel):
 
 # 用户登录请求
 class UserLogin(BaseModel):
+    # 验证码ID使用获取验证码接口返回的 captchaId，同时兼容 captcha_id
+    model_config = ConfigDict(populate_by_name=True)
+
     username: str
     password: str
     captcha: Optional[str] = None
+    captcha_id: Optional[str] = Field(None, alias="captchaId")
     is_quick: Optional[bool] = False
 
 # 用户资料更新请求
@@ -49,6 +53,10 @@ class UserQuery(BaseModel):
     username: Optional[str] = None
     enable: Optional[bool] = None
 
+# 刷新令牌请求
+class TokenRefresh(BaseModel):
+    refreshToken: str
+
 # 令牌响应
 class Token(BaseModel):
     access_token: str
@@ -61,4 +69,24 @@ class UserDetail(BaseModel):
     enable: bool
     roles: List[Any]
     permissions: List[Any]
-    profile: Optional[Any] = None 
\ No newline at end of file
+    profile: Optional[Any] = None 
+
+# 当前登录用户（缓存使用的精简用户信息）
+class Principal(BaseModel):
+    id: int
+    username: str
+    enable: bool
+    # 用户数据版本号，用户信息或资料变更时递增
+    version: int = 0
+
+# 用户授权快照（角色与权限编码）
+class AuthzSnapshot(BaseModel):
+    user_id: int
+    version: int
+    role_ids: List[int] = []
+    role_codes: List[str] = []
+    permission_codes: List[str] = []
+
+    @property
+    def is_super_admin(self) -> bool:
+        return "SUPER_ADMIN" in self.role_codes
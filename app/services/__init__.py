@@ -1,8 +1,12 @@
 from app.services.auth import AuthService
 from app.services.user import UserService
 from app.services.role import RoleService
+from app.services.principal import PrincipalService
+from app.services.authz import AuthzService
 __all__ = [
     "UserService",
     "RoleService",
     "PermissionService",
+    "PrincipalService",
+    "AuthzService",
 ] 
\ No newline at end of file
@@ -1,11 +1,18 @@
 from app.models.user import User
-from app.core.security import verify_password, create_access_token
+from app.core.security import create_access_token
+from app.core.hasher import password_hasher
+from app.core.revocation import revocation_store
+from app.core.captcha import captcha_pool
 from app.utils.exceptions import CustomException, ErrorCode
 from app.services.user import UserService
+from app.services.session import SessionService
+from app.services.principal import PrincipalService
 from app.core.redis import redis_client
 from typing import Dict, Any, Optional
+from fastapi import status
 from datetime import timedelta
 from app.core.config import settings
+import uuid
 
 class AuthService:
     @staticmethod
@@ -15,38 +22,128 @@ class AuthService:
         if not user:
             return None
         
-        if not verify_password(password, user.password):
+        verified, new_hash = await password_hasher.verify_and_update(password, user.password)
+        if not verified:
             return None
         
+        # 哈希算法或成本参数已调整，登录时透明地重新哈希
+        if new_hash:
+            await User.filter(id=user.id).update(password=new_hash)
+            user.password = new_hash
+        
         return user
     
     @staticmethod
-    async def login(user: User) -> Dict[str, Any]:
-        """用户登录"""
-        # 生成访问令牌
+    def _token_data(user_id: int, session_id: Optional[str] = None, refresh_token: Optional[str] = None) -> Dict[str, Any]:
+        """生成访问令牌响应"""
+        # 访问令牌记录会话ID，登出时一并注销会话
         access_token = create_access_token(
-            subject=user.id,
-            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+            subject=user_id,
+            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+            claims={"sid": session_id} if session_id else None
         )
         
-        return {
+        token_data = {
             "accessToken": access_token,
-            "token_type": "bearer"
+            "token_type": "bearer",
+            "expiresIn": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
         }
+        if refresh_token:
+            token_data["refreshToken"] = refresh_token
+        return token_data
+    
+    @staticmethod
+    async def login(user: User) -> Dict[str, Any]:
+        """用户登录（创建刷新令牌会话）"""
+        session_id, refresh_token = await SessionService.create_session(user.id)
+        return AuthService._token_data(user.id, session_id, refresh_token)
+    
+    @staticmethod
+    async def renew_access_token(user_id: int, claims: Dict[str, Any]) -> Dict[str, Any]:
+        """使用有效的访问令牌换取新的访问令牌（沿用当前会话）
+
+        会话已注销（登出、修改密码、刷新令牌重用检测）或令牌不属于任何会话时拒绝续期，
+        并吊销当前访问令牌，避免凭访问令牌无限续期绕过会话注销。
+        """
+        session_id = claims.get("sid")
+        if not await SessionService.is_active(session_id):
+            jti = claims.get("jti")
+            if jti:
+                await revocation_store.revoke_token(jti, claims["exp"])
+            raise CustomException(
+                error_code=ErrorCode.ERR_10002,
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+        return AuthService._token_data(user_id, session_id)
+    
+    @staticmethod
+    async def refresh(refresh_token: str) -> Dict[str, Any]:
+        """使用刷新令牌续期：轮换刷新令牌并签发新的访问令牌"""
+        rotated = await SessionService.rotate(refresh_token)
+        if not rotated:
+            raise CustomException(
+                error_code=ErrorCode.ERR_10002,
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        user_id, session_id, new_refresh_token = rotated
+        user = await PrincipalService.get_principal(user_id)
+        if not user or not user.enable:
+            await SessionService.revoke_session(user_id, session_id)
+            raise CustomException(
+                error_code=ErrorCode.ERR_10002,
+                status_code=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        return AuthService._token_data(user_id, session_id, new_refresh_token)
+    
+    @staticmethod
+    async def logout(user_id: int, claims: Dict[str, Any]) -> bool:
+        """用户登出（吊销当前令牌并注销会话）"""
+        session_id = claims.get("sid")
+        if session_id:
+            await SessionService.revoke_session(user_id, session_id)
+        
+        jti = claims.get("jti")
+        if jti:
+            await revocation_store.revoke_token(jti, claims["exp"])
+        else:
+            # 旧版本签发的令牌没有 jti，只能吊销该用户的全部令牌
+            await revocation_store.revoke_user(user_id)
+        return True
     
     @staticmethod
-    async def logout(user_id: int) -> bool:
-        """用户登出"""
-        # 可以在这里实现令牌黑名单等逻辑
+    async def logout_all(user_id: int) -> bool:
+        """吊销用户的全部令牌并注销全部会话"""
+        await SessionService.revoke_user_sessions(user_id)
+        await revocation_store.revoke_user(user_id)
         return True
     
     @staticmethod
-    async def validate_captcha(session_code: str, user_captcha: str) -> bool:
-        """验证验证码"""
-        if not session_code or not user_captcha:
+    async def create_captcha() -> Dict[str, Any]:
+        """生成验证码，答案保存在 Redis 中"""
+        captcha_text, captcha_base64 = await captcha_pool.acquire()
+        captcha_id = uuid.uuid4().hex
+        await redis_client.set(f"captcha:{captcha_id}", captcha_text.lower(), expire=settings.CAPTCHA_TTL)
+        
+        return {
+            "captcha": captcha_base64,
+            "captchaId": captcha_id
+        }
+    
+    @staticmethod
+    async def validate_captcha(captcha_id: str, user_captcha: str) -> bool:
+        """验证验证码（一次性使用）"""
+        if not captcha_id or not user_captcha:
+            return False
+        
+        answer = await redis_client.getdel(f"captcha:{captcha_id}")
+        if not answer:
             return False
         
-        return session_code.lower() == user_captcha.lower()
+        if isinstance(answer, bytes):
+            answer = answer.decode()
+        return answer == user_captcha.lower()
     
     @staticmethod
     async def change_password(user_id: int, old_password: str, new_password: str) -> bool:
@@ -55,7 +152,7 @@ class AuthService:
         if not user:
             raise CustomException(ErrorCode.ERR_11001)
         
-        if not verify_password(old_password, user.password):
+        if not await password_hasher.verify(old_password, user.password):
             raise CustomException(ErrorCode.ERR_10004)
         
         return await UserService.reset_password(user_id, new_password) 
\ No newline at end of file
@@ -0,0 +1,119 @@
+from app.models.role import Role
+from app.models.permission import Permission
+from app.schemas.user import AuthzSnapshot
+from app.core.cache import LRUCache, cache_bus
+from app.core.redis import redis_client
+from app.core.config import settings
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+# 本地缓存：用户ID -> AuthzSnapshot
+authz_cache = LRUCache(maxsize=settings.AUTHZ_CACHE_SIZE, ttl=settings.AUTHZ_CACHE_TTL)
+
+
+class AuthzService:
+    """用户授权快照服务
+
+    快照包含用户的角色ID、角色编码和有效权限编码，并记录构建时的授权版本号。
+    角色、权限分配发生变化时递增全局版本号，版本号与当前版本不同的快照视为过期，
+    因此鉴权热路径只需要比较内存中的版本号，不访问数据库和 Redis。
+
+    版本号只比较是否相等而不比较大小：Redis 中的版本号丢失或被重置后会从一个随机起点重新计数，
+    不会重复使用旧的版本号，旧版本号的快照、权限树缓存和 ETag 都不会被误认为是最新的。
+    """
+
+    VERSION_KEY = "authz:version"
+
+    # 当前进程已知的最新授权版本号
+    version: int = 0
+
+    @staticmethod
+    def _redis_key(user_id: int) -> str:
+        return f"authz:snapshot:{user_id}"
+
+    @staticmethod
+    def _on_version(version) -> None:
+        """收到新的授权版本号"""
+        version = int(version)
+        if version != AuthzService.version:
+            AuthzService.version = version
+            authz_cache.clear()
+
+    @staticmethod
+    async def sync_version() -> int:
+        """从 Redis 同步当前授权版本号"""
+        try:
+            version = await redis_client.get(AuthzService.VERSION_KEY)
+            if version is not None:
+                AuthzService._on_version(version)
+        except Exception as e:
+            logger.warning(f"同步授权版本号失败: {e}")
+        return AuthzService.version
+
+    @staticmethod
+    async def bump() -> int:
+        """递增授权版本号，使所有授权快照失效（需在事务提交后调用）"""
+        try:
+            # 版本号不存在（首次使用或 Redis 数据丢失）时从随机起点开始计数
+            await redis_client.set(AuthzService.VERSION_KEY, str(random.randrange(1 << 32, 1 << 48)), nx=True)
+            version = await redis_client.incr(AuthzService.VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"递增授权版本号失败: {e}")
+            version = AuthzService.version + 1
+
+        await cache_bus.publish("authz", version)
+        return version
+
+    @staticmethod
+    async def build_snapshot(user_id: int, version: int) -> AuthzSnapshot:
+        """从数据库构建授权快照"""
+        roles = await Role.filter(users__id=user_id).order_by("id").values("id", "code")
+        role_ids = [role["id"] for role in roles]
+
+        permission_codes = []
+        if role_ids:
+            permission_codes = await Permission.filter(roles__id__in=role_ids).distinct().values_list("code", flat=True)
+
+        return AuthzSnapshot(
+            user_id=user_id,
+            version=version,
+            role_ids=role_ids,
+            role_codes=[role["code"] for role in roles],
+            permission_codes=sorted(permission_codes),
+        )
+
+    @staticmethod
+    async def get_snapshot(user_id: int) -> AuthzSnapshot:
+        """获取用户授权快照，依次查询本地缓存、Redis、数据库"""
+        version = AuthzService.version
+        snapshot = authz_cache.get(user_id)
+        if snapshot is not None and snapshot.version == version:
+            return snapshot
+
+        key = AuthzService._redis_key(user_id)
+        snapshot = None
+        try:
+            cached = await redis_client.get(key)
+            if cached:
+                snapshot = AuthzSnapshot.model_validate_json(cached)
+        except Exception as e:
+            logger.warning(f"读取授权快照失败: {e}")
+
+        if snapshot is None or snapshot.version != version:
+            # 先记录版本号再查询数据库，构建期间发生的变更会使快照在下次访问时重建
+            snapshot = await AuthzService.build_snapshot(user_id, version)
+            try:
+                await redis_client.set(key, snapshot.model_dump_json(), expire=settings.AUTHZ_REDIS_TTL)
+            except Exception as e:
+                logger.warning(f"写入授权快照失败: {e}")
+
+        authz_cache.set(user_id, snapshot)
+        return snapshot
+
+
+# 其他进程修改角色或权限分配后，同步本进程的授权版本号
+cache_bus.register("authz", AuthzService._on_version)
+# 订阅建立或断线重连后，补上订阅断开期间可能错过的版本号变更
+cache_bus.on_connect(AuthzService.sync_version)
@@ -0,0 +1,109 @@
+from tortoise.queryset import QuerySet
+from app.core.cache import LRUCache, cache_bus
+from app.core.config import settings
+from app.utils.sql import parameterized_sql
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 总数计算方式：exact 精确计数（带缓存），estimate 使用统计信息估算，none 不返回总数
+TOTAL_MODES = ("exact", "estimate", "none")
+
+
+class ListCounter:
+    """分页列表总数缓存
+
+    以 (表名, 表版本, 计数方式, 规范化的过滤条件) 为键缓存 COUNT 结果，短时间内翻页或重复查询
+    不再重复执行 COUNT。表数据新增、删除或修改时递增表版本，并通过 cache_bus 通知其他进程。
+    """
+
+    def __init__(self):
+        self.cache = LRUCache(maxsize=settings.LIST_COUNT_CACHE_SIZE, ttl=settings.LIST_COUNT_CACHE_TTL)
+        # 表名 -> 版本号，版本号变化后旧的缓存键不再命中，由 LRU 淘汰
+        self.versions: Dict[str, int] = {}
+
+    def _on_invalidate(self, table: str):
+        self.versions[table] = self.versions.get(table, 0) + 1
+
+    async def invalidate(self, table: str):
+        """表数据变更后调用（需在事务提交之后）"""
+        await cache_bus.publish("list_count", table)
+
+    @staticmethod
+    def _normalize(filters: Dict[str, Any]) -> tuple:
+        """去掉未生效的过滤条件并排序，使等价的查询得到相同的缓存键
+
+        其余值原样使用，必须与构造查询时使用的值完全一致（如不能去掉首尾空格）
+        """
+        return tuple(sorted(
+            (name, value) for name, value in filters.items()
+            if value is not None and value != ""
+        ))
+
+    async def total(self, query: QuerySet, filters: Dict[str, Any], mode: str = "exact") -> Optional[int]:
+        """获取过滤后的总数
+
+        query: 已应用过滤条件的查询
+        filters: 构成该查询的过滤参数，用作缓存键
+        """
+        if mode == "none":
+            return None
+
+        table = query.model._meta.db_table
+        key = (table, self.versions.get(table, 0), mode, self._normalize(filters))
+        total = self.cache.get(key)
+        if total is not None:
+            return total
+
+        if mode == "estimate":
+            # 估算值不准确，已有精确计数缓存时直接使用
+            total = self.cache.get((table, self.versions.get(table, 0), "exact", key[3]))
+            if total is None:
+                total = await self._estimate(query, bool(key[3]))
+        if total is None:
+            total = await query.count()
+
+        self.cache.set(key, total)
+        return total
+
+    @staticmethod
+    async def _estimate(query: QuerySet, filtered: bool) -> Optional[int]:
+        """使用 MySQL 统计信息估算总数，无法估算时返回 None
+
+        - 无过滤条件：information_schema.TABLES 中的表行数
+        - 有过滤条件：EXPLAIN 的扫描行数乘以过滤比例
+        """
+        db = query.model._meta.db
+        if db.capabilities.dialect != "mysql":
+            return None
+
+        try:
+            if not filtered:
+                rows = await db.execute_query_dict(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [query.model._meta.db_table],
+                )
+                if rows and rows[0]["TABLE_ROWS"] is not None:
+                    return int(rows[0]["TABLE_ROWS"])
+                return None
+
+            # 生成带占位符的 SQL 和参数，参数不内联到语句中
+            sql, params = parameterized_sql(query)
+            rows = await db.execute_query_dict("EXPLAIN " + sql, params)
+            if rows and rows[0].get("rows") is not None:
+                return int(rows[0]["rows"] * float(rows[0].get("filtered") or 100) / 100)
+        except Exception as e:
+            logger.warning(f"估算列表总数失败: {e}")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+
+# 创建分页列表总数缓存实例
+list_counter = ListCounter()
+
+# 任一进程修改表数据后，清理本进程的总数缓存
+cache_bus.register("list_count", list_counter._on_invalidate)
@@ -1,7 +1,62 @@
-from app.models.permission import Permission
+from app.models.permission import Permission, PermissionClosure
 from app.schemas.permission import PermissionCreate, PermissionUpdate, PermissionNode
 from app.utils.exceptions import CustomException, ErrorCode
-from typing import List, Optional, Dict, Any
+from app.utils.pagination import keyset_query, keyset_page
+from app.utils.projection import Projection
+from app.services.authz import AuthzService
+from app.services.permission_closure import PermissionClosureService
+from app.services.permission_cache import permission_cache, PermissionSnapshot, PERMISSION_FIELDS
+from app.services.stats import stats_counters, permission_deltas
+from app.services.list_count import list_counter
+from app.services.search import search_index, fulltext_filter
+from app.services.permission_changes import permission_change_log
+from app.services.permission_tree import PermissionTreeIndex, MenuPathIndex, MENU_FIELDS, is_menu, is_visible_menu
+from tortoise.expressions import Subquery
+from tortoise.transactions import in_transaction
+from typing import List, Optional, Dict, Any, Set
+
+
+# 权限列表查询结果投影，只选取权限表字段生成字典
+PERMISSION_ITEM = Projection(*PERMISSION_FIELDS)
+
+
+def get_tree_index(snapshot: PermissionSnapshot) -> PermissionTreeIndex:
+    """获取快照对应的权限树索引"""
+    return snapshot.view("tree_index", lambda item: PermissionTreeIndex(item.rows))
+
+
+def _tree_view(fields, predicate=None):
+    def build(snapshot: PermissionSnapshot) -> List[Dict[str, Any]]:
+        return get_tree_index(snapshot).build(fields, predicate)
+    return build
+
+
+BUTTON_FIELDS = ("id", "name", "code", "type", "parent_id", "path", "method", "description", "enable", "order")
+
+
+def _build_button_index(snapshot: PermissionSnapshot) -> Dict[int, List[Dict[str, Any]]]:
+    """菜单ID -> 已启用的按钮权限列表"""
+    index = get_tree_index(snapshot)
+    button_index: Dict[int, List[Dict[str, Any]]] = {}
+    for parent_id, child_ids in index.children.items():
+        if parent_id is None:
+            continue
+        buttons = [
+            {field: index.nodes[child_id][field] for field in BUTTON_FIELDS}
+            for child_id in child_ids
+            if index.nodes[child_id]["type"] == "BUTTON" and index.nodes[child_id]["enable"]
+        ]
+        if buttons:
+            button_index[parent_id] = buttons
+    return button_index
+
+
+# 权限树视图：全部权限、启用且显示的菜单、全部菜单（资源管理）
+TREE_BUILDERS = {
+    "permission_tree": _tree_view(PERMISSION_FIELDS),
+    "menu_tree": _tree_view(MENU_FIELDS, is_visible_menu),
+    "resource_menu_tree": _tree_view(MENU_FIELDS, is_menu),
+}
 
 class PermissionService:
     @staticmethod
@@ -13,7 +68,14 @@ class PermissionService:
             raise CustomException(ErrorCode.ERR_13002)
         
         # 创建权限
-        permission = await Permission.create(**permission_data.dict())
+        async with in_transaction():
+            permission = await Permission.create(**permission_data.dict())
+            await PermissionClosureService.insert_node(permission.id, permission.parent_id)
+        await permission_cache.bump()
+        await stats_counters.incr(permission_deltas(permission))
+        await permission_change_log.record("insert", permission.id)
+        await list_counter.invalidate("permission")
+        await search_index.upsert("permission", permission)
         
         return permission
     
@@ -31,21 +93,41 @@ class PermissionService:
         
         # 将 PermissionUpdate 模型转换为字典
         update_data = permission_data.dict(exclude_unset=True)
+        was_enabled = permission.enable
         
         # 特别处理 parent_id 字段
+        parent_changed = False
         if 'parent_id' in update_data:
+            parent_changed = update_data['parent_id'] != permission.parent_id
             # 确保 parent_id 被正确设置，即使是 None 值
             permission.parent_id = update_data['parent_id']
             # 从 update_data 中移除 parent_id，因为我们已经手动处理了
             del update_data['parent_id']
         
-        # 更新其他字段
-        if update_data:
-            await permission.update_from_dict(update_data).save()
-        else:
-            # 如果只有 parent_id 被更新，需要手动保存
-            await permission.save()
+        async with in_transaction():
+            if parent_changed:
+                # 上级不能是自身或其下级，避免权限树出现循环（锁定闭包记录后检查，与并发的移动串行执行）
+                await PermissionClosureService.check_parent(permission_id, permission.parent_id)
+            
+            # 更新其他字段
+            if update_data:
+                await permission.update_from_dict(update_data).save()
+            else:
+                # 如果只有 parent_id 被更新，需要手动保存
+                await permission.save()
+            
+            if parent_changed:
+                await PermissionClosureService.move_node(permission_id, permission.parent_id)
         
+        await permission_cache.bump()
+        await permission_change_log.record("update", permission_id)
+        await list_counter.invalidate("permission")
+        await search_index.upsert("permission", permission)
+        if permission.enable != was_enabled:
+            await stats_counters.incr(
+                {"permission:enabled": 1, "permission:disabled": -1} if permission.enable
+                else {"permission:enabled": -1, "permission:disabled": 1}
+            )
         return permission
     
     @staticmethod
@@ -55,7 +137,16 @@ class PermissionService:
         if not permission:
             raise CustomException(ErrorCode.ERR_13001)
         
-        await permission.delete()
+        async with in_transaction():
+            await permission.delete()
+            await PermissionClosureService.delete_node(permission_id)
+        await permission_cache.bump()
+        await stats_counters.incr(permission_deltas(permission, -1))
+        await permission_change_log.record("delete", permission_id)
+        await list_counter.invalidate("permission")
+        await search_index.remove("permission", permission_id)
+        # 删除权限会级联删除角色权限关联
+        await AuthzService.bump()
         return True
     
     @staticmethod
@@ -65,16 +156,22 @@ class PermissionService:
         name: Optional[str] = None,
         code: Optional[str] = None,
         type: Optional[str] = None,
-        enable: Optional[bool] = None
+        enable: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact"
     ) -> Dict[str, Any]:
-        """获取权限列表"""
+        """获取权限列表
+
+        cursor 不为 None 时使用游标分页（按 id 排序），空字符串表示第一页
+        total_mode: 总数计算方式，exact 精确计数（带缓存），estimate 估算，none 不计算
+        """
         query = Permission.all()
         
         if name:
-            query = query.filter(name__contains=name)
+            query = fulltext_filter.contains(query, "name", name)
         
         if code:
-            query = query.filter(code__contains=code)
+            query = fulltext_filter.contains(query, "code", code)
         
         if type:
             query = query.filter(type=type)
@@ -82,197 +179,184 @@ class PermissionService:
         if enable is not None:
             query = query.filter(enable=enable)
         
-        total = await query.count()
-        permissions = await query.offset((page - 1) * page_size).limit(page_size).all()
+        if cursor is not None:
+            permissions, next_cursor = keyset_page(
+                await PERMISSION_ITEM.all(keyset_query(query, page_size, cursor)), page_size
+            )
+            return {
+                "items": permissions,
+                "nextCursor": next_cursor,
+                "hasMore": next_cursor is not None,
+                "page_size": page_size
+            }
+        
+        total = await list_counter.total(query, {"name": name, "code": code, "type": type, "enable": enable}, total_mode)
+        permissions = await PERMISSION_ITEM.all(query.offset((page - 1) * page_size).limit(page_size))
         
         return {
             "items": permissions,
             "total": total,
+            "totalMode": total_mode,
             "page": page,
             "page_size": page_size
         }
     
     @staticmethod
     async def get_permission_tree() -> List[Dict[str, Any]]:
-        """获取权限树"""
-        # 获取所有权限
-        permissions = await Permission.all().order_by("order")
-        
-        # 构建权限树
-        permission_map = {}
-        root_permissions = []
-        
-        # 先将所有权限放入字典
-        for permission in permissions:
-            permission_dict = {
-                "id": permission.id,
-                "name": permission.name,
-                "code": permission.code,
-                "type": permission.type,
-                "parent_id": permission.parent_id,
-                "path": permission.path,
-                "redirect": permission.redirect,
-                "icon": permission.icon,
-                "component": permission.component,
-                "layout": permission.layout,
-                "keep_alive": permission.keep_alive,
-                "method": permission.method,
-                "description": permission.description,
-                "show": permission.show,
-                "enable": permission.enable,
-                "order": permission.order,
-                "children": []
-            }
-            permission_map[permission.id] = permission_dict
-        
-        # 构建树结构
-        for permission_id, permission_dict in permission_map.items():
-            parent_id = permission_dict["parent_id"]
-            if parent_id is None:
-                root_permissions.append(permission_dict)
-            else:
-                if parent_id in permission_map:
-                    permission_map[parent_id]["children"].append(permission_dict)
-        
-        return root_permissions
+        """获取权限树（共享只读数据，调用方不可修改）"""
+        snapshot = await permission_cache.get()
+        return snapshot.view("permission_tree", TREE_BUILDERS["permission_tree"])
         
     @staticmethod
     async def get_menu_tree() -> List[Dict[str, Any]]:
         """获取菜单树 - 用于路由菜单显示"""
-        # 获取所有启用的菜单类型的权限
-        permissions = await Permission.filter(type="MENU", enable=True, show=True).order_by("order")
-        
-        # 构建菜单树
-        menu_map = {}
-        root_menus = []
-        
-        # 先将所有菜单放入字典
-        for permission in permissions:
-            menu_dict = {
-                "id": permission.id,
-                "name": permission.name,
-                "code": permission.code,
-                "type": permission.type,
-                "parent_id": permission.parent_id,
-                "path": permission.path,
-                "redirect": permission.redirect,
-                "icon": permission.icon,
-                "component": permission.component,
-                "layout": permission.layout,
-                "keep_alive": permission.keep_alive,
-                "enable": permission.enable,
-                "show": permission.show,
-                "order": permission.order,
-                "children": []
-            }
-            menu_map[permission.id] = menu_dict
-        
-        # 构建树结构
-        for menu_id, menu_dict in menu_map.items():
-            parent_id = menu_dict["parent_id"]
-            if parent_id is None:
-                root_menus.append(menu_dict)
-            else:
-                if parent_id in menu_map:
-                    menu_map[parent_id]["children"].append(menu_dict)
-        
-        return root_menus
+        snapshot = await permission_cache.get()
+        return snapshot.view("menu_tree", TREE_BUILDERS["menu_tree"])
 
     @staticmethod
     async def get_resource_menu_tree() -> List[Dict[str, Any]]:
         """获取资源管理菜单树 - 用于资源管理页面显示"""
-        # 获取所有菜单类型的权限，包括禁用的
-        permissions = await Permission.filter(type="MENU").order_by("order")
-        
-        # 构建菜单树
-        menu_map = {}
-        root_menus = []
-        
-        # 先将所有菜单放入字典
-        for permission in permissions:
-            menu_dict = {
-                "id": permission.id,
-                "name": permission.name,
-                "code": permission.code,
-                "type": permission.type,
-                "parent_id": permission.parent_id,
-                "path": permission.path,
-                "redirect": permission.redirect,
-                "icon": permission.icon,
-                "component": permission.component,
-                "layout": permission.layout,
-                "keep_alive": permission.keep_alive,
-                "enable": permission.enable,
-                "show": permission.show,
-                "order": permission.order,
-                "children": []
+        snapshot = await permission_cache.get()
+        return snapshot.view("resource_menu_tree", TREE_BUILDERS["resource_menu_tree"])
+
+    @staticmethod
+    async def get_encoded_tree(name: str) -> bytes:
+        """获取权限树视图包装为成功响应后的 JSON 字节
+
+        name: permission_tree、menu_tree、resource_menu_tree
+        """
+        snapshot = await permission_cache.get()
+        return snapshot.encoded(name, TREE_BUILDERS[name])
+    
+    @staticmethod
+    def _build_children(snapshot: PermissionSnapshot, parent_id: Optional[int], type: Optional[str]) -> List[Dict[str, Any]]:
+        index = get_tree_index(snapshot)
+        if parent_id is not None and parent_id not in index.nodes:
+            raise CustomException(ErrorCode.ERR_13001)
+
+        def matches(row: Dict[str, Any]) -> bool:
+            return type is None or row["type"] == type
+
+        children = []
+        for row in index.get_children(parent_id):
+            if not matches(row):
+                continue
+            child_count = sum(1 for child in index.get_children(row["id"]) if matches(child))
+            children.append({
+                **{field: row[field] for field in PERMISSION_FIELDS},
+                "hasChildren": child_count > 0,
+                "childCount": child_count,
+            })
+        return children
+
+    @staticmethod
+    async def get_children(parent_id: Optional[int] = None, type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取直接下级权限（不传 parent_id 时返回根节点），用于按需展开权限树
+
+        type: 只返回指定类型的下级，childCount 同样只统计该类型
+        """
+        snapshot = await permission_cache.get()
+        return snapshot.view(
+            f"children:{parent_id}:{type}",
+            lambda item: PermissionService._build_children(item, parent_id, type)
+        )
+
+    @staticmethod
+    async def get_encoded_children(parent_id: Optional[int] = None, type: Optional[str] = None) -> bytes:
+        """获取直接下级权限包装为成功响应后的 JSON 字节"""
+        snapshot = await permission_cache.get()
+        return snapshot.encoded(
+            f"children:{parent_id}:{type}",
+            lambda item: PermissionService._build_children(item, parent_id, type)
+        )
+    
+    @staticmethod
+    async def get_subtree(permission_id: int) -> Dict[str, Any]:
+        """获取权限及其全部下级组成的子树（通过闭包表查询，不加载整张权限表）"""
+        rows = await Permission.filter(
+            id__in=Subquery(PermissionClosure.filter(ancestor_id=permission_id).values("descendant_id"))
+        ).values(*PERMISSION_FIELDS)
+        if not rows:
+            raise CustomException(ErrorCode.ERR_13001)
+
+        return PermissionTreeIndex(rows, root_id=permission_id).build(PERMISSION_FIELDS)[0]
+
+    @staticmethod
+    async def get_ancestors(permission_id: int, include_self: bool = False) -> List[Dict[str, Any]]:
+        """获取权限的祖先链，从根节点到直接上级排列"""
+        depths = await PermissionClosureService.get_ancestor_depths(permission_id)
+        if not depths:
+            raise CustomException(ErrorCode.ERR_13001)
+        if not include_self:
+            depths.pop(permission_id, None)
+
+        rows = await Permission.filter(id__in=list(depths)).values(*PERMISSION_FIELDS)
+        return sorted(rows, key=lambda row: depths[row["id"]], reverse=True)
+
+    @staticmethod
+    async def get_breadcrumb(permission_id: int) -> List[Dict[str, Any]]:
+        """获取面包屑导航：从根节点到当前权限"""
+        ancestors = await PermissionService.get_ancestors(permission_id, include_self=True)
+        return [
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "code": row["code"],
+                "path": row["path"],
+                "icon": row["icon"],
             }
-            menu_map[permission.id] = menu_dict
-        
-        # 构建树结构
-        for menu_id, menu_dict in menu_map.items():
-            parent_id = menu_dict["parent_id"]
-            if parent_id is None:
-                root_menus.append(menu_dict)
-            else:
-                if parent_id in menu_map:
-                    menu_map[parent_id]["children"].append(menu_dict)
-        
-        return root_menus
+            for row in ancestors
+        ]
     
     @staticmethod
     async def get_button_permissions(menu_id: int) -> List[Dict[str, Any]]:
         """获取特定菜单下的按钮权限"""
-        # 获取所有按钮类型的权限，且父ID为指定的菜单ID
-        buttons = await Permission.filter(type="BUTTON", parent_id=menu_id, enable=True).order_by("order")
-        
-        # 将按钮权限转换为字典列表
-        button_list = []
-        for button in buttons:
-            button_dict = {
-                "id": button.id,
-                "name": button.name,
-                "code": button.code,
-                "type": button.type,
-                "parent_id": button.parent_id,
-                "path": button.path,
-                "method": button.method,
-                "description": button.description,
-                "enable": button.enable,
-                "order": button.order
-            }
-            button_list.append(button_dict)
-        
-        return button_list
+        snapshot = await permission_cache.get()
+        return snapshot.view("button_index", _build_button_index).get(menu_id, [])
+
+    @staticmethod
+    async def get_button_permissions_batch(
+        menu_ids: List[int],
+        permission_codes: Optional[Set[str]] = None
+    ) -> Dict[int, List[Dict[str, Any]]]:
+        """批量获取多个菜单下的按钮权限
+
+        permission_codes: 只返回编码在该集合中的按钮，为 None 时不过滤
+        """
+        snapshot = await permission_cache.get()
+        button_index = snapshot.view("button_index", _build_button_index)
+
+        result = {}
+        for menu_id in dict.fromkeys(menu_ids):
+            buttons = button_index.get(menu_id, [])
+            if permission_codes is not None:
+                buttons = [button for button in buttons if button["code"] in permission_codes]
+            result[menu_id] = buttons
+        return result
     
+    @staticmethod
+    async def get_menu_status(paths: List[str]) -> Dict[str, Dict[str, Any]]:
+        """查询前端路由路径对应菜单的状态：是否存在、是否禁用、菜单名称"""
+        snapshot = await permission_cache.get()
+        path_index = snapshot.view("menu_path_index", lambda item: MenuPathIndex(item.rows))
+
+        result = {}
+        for path in paths:
+            menu = path_index.match(path)
+            result[path] = {
+                "exists": menu is not None,
+                "disabled": menu is not None and not menu["enable"],
+                "menuName": menu["name"] if menu is not None else None
+            }
+        return result
+
     @staticmethod
     async def get_permission_stats() -> Dict[str, Any]:
         """获取权限统计数据"""
-        # 获取所有权限
-        permissions = await Permission.all()
-        
-        # 初始化统计数据
-        menu_count = 0
-        button_count = 0
-        enabled_count = 0
-        disabled_count = 0
-        
-        # 统计各类型权限数量
-        for permission in permissions:
-            if permission.type == "MENU":
-                menu_count += 1
-            elif permission.type == "BUTTON":
-                button_count += 1
-                
-            if permission.enable:
-                enabled_count += 1
-            else:
-                disabled_count += 1
-        
-        # 返回统计结果
+        counters = await stats_counters.get()
         return {
-            "menuCount": menu_count,
-            "buttonCount": button_count,
-            "enabledCount": enabled_count,
-            "disabledCount": disabled_count
-        } 
\ No newline at end of file
+            "menuCount": counters["permission:menu"],
+            "buttonCount": counters["permission:button"],
+            "enabledCount": counters["permission:enabled"],
+            "disabledCount": counters["permission:disabled"]
+        }
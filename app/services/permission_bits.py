@@ -0,0 +1,83 @@
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.services.authz import AuthzService
+from app.services.permission_cache import permission_cache, PermissionSnapshot
+from typing import Dict, Iterable
+
+# 角色组合权限位图缓存：(授权版本, 权限版本, 角色ID组合) -> PermissionBits
+# 与授权快照使用相同的过期时间，错过版本号广播时撤销的权限最迟在过期后生效
+permission_bits_cache = LRUCache(maxsize=settings.PERMISSION_BITS_CACHE_SIZE, ttl=settings.AUTHZ_CACHE_TTL)
+
+
+def get_code_index(snapshot: PermissionSnapshot) -> Dict[str, int]:
+    """权限编码 -> 位序号，只包含启用的权限，按 id 顺序稠密编号"""
+    def build(item: PermissionSnapshot) -> Dict[str, int]:
+        rows = sorted((row for row in item.rows if row["enable"]), key=lambda row: row["id"])
+        return {row["code"]: position for position, row in enumerate(rows)}
+    return snapshot.view("code_index", build)
+
+
+class PermissionBits:
+    """用户有效权限位图
+
+    每个启用的权限编码对应一个位，用户拥有的权限编译为一个整数，
+    单个权限检查是一次字典查找加一次位运算。超级管理员拥有所有权限。
+    """
+
+    __slots__ = ("code_index", "bits", "is_super_admin")
+
+    def __init__(self, code_index: Dict[str, int], bits: int, is_super_admin: bool = False):
+        self.code_index = code_index
+        self.bits = bits
+        self.is_super_admin = is_super_admin
+
+    @classmethod
+    def compile(cls, code_index: Dict[str, int], codes: Iterable[str], is_super_admin: bool = False) -> "PermissionBits":
+        return cls(code_index, cls.mask(code_index, codes), is_super_admin)
+
+    @staticmethod
+    def mask(code_index: Dict[str, int], codes: Iterable[str]) -> int:
+        """将权限编码编译为位掩码，未知或已禁用的编码被忽略"""
+        bits = 0
+        for code in codes:
+            position = code_index.get(code)
+            if position is not None:
+                bits |= 1 << position
+        return bits
+
+    def has(self, code: str) -> bool:
+        if self.is_super_admin:
+            return True
+        position = self.code_index.get(code)
+        return position is not None and (self.bits >> position) & 1 == 1
+
+    def has_any(self, codes: Iterable[str]) -> bool:
+        return self.is_super_admin or self.bits & self.mask(self.code_index, codes) != 0
+
+    def has_all(self, codes: Iterable[str]) -> bool:
+        if self.is_super_admin:
+            return True
+        codes = list(codes)
+        if any(code not in self.code_index for code in codes):
+            return False
+        required = self.mask(self.code_index, codes)
+        return self.bits & required == required
+
+
+class PermissionBitsService:
+    """用户权限位图服务，角色组合相同的用户共享同一个位图"""
+
+    @staticmethod
+    async def get_bits(user_id: int) -> PermissionBits:
+        """获取用户的有效权限位图"""
+        snapshot = await AuthzService.get_snapshot(user_id)
+        permissions = await permission_cache.get()
+
+        key = (snapshot.version, permissions.version, tuple(snapshot.role_ids))
+        bits = permission_bits_cache.get(key)
+        if bits is None:
+            bits = PermissionBits.compile(
+                get_code_index(permissions), snapshot.permission_codes, snapshot.is_super_admin
+            )
+            permission_bits_cache.set(key, bits)
+        return bits
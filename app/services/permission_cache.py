@@ -0,0 +1,138 @@
+from app.models.permission import Permission
+from app.core.cache import cache_bus
+from app.core.redis import redis_client
+from app.core.config import settings
+from app.utils.response import ResponseModel
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+# 快照中保存的权限字段
+PERMISSION_FIELDS = (
+    "id", "name", "code", "type", "parent_id", "path", "redirect", "icon", "component",
+    "layout", "keep_alive", "method", "description", "show", "enable", "order",
+)
+
+
+class PermissionSnapshot:
+    """权限表快照
+
+    同一版本的快照在进程内共享，由快照派生的视图（权限树等）及其 JSON 编码结果
+    也随快照缓存，版本号变化后整体替换。快照及派生数据均为只读，调用方不可修改。
+    """
+
+    def __init__(self, version: int, rows: List[Dict[str, Any]]):
+        self.version = version
+        self.rows = rows
+        self.loaded_at = time.monotonic()
+        self._views: Dict[str, Any] = {}
+        self._encoded: Dict[str, bytes] = {}
+
+    def view(self, name: str, builder: Callable[["PermissionSnapshot"], Any]) -> Any:
+        """获取派生视图，同一快照内只构建一次（builder 接收快照本身，可以复用其他视图）"""
+        if name not in self._views:
+            self._views[name] = builder(self)
+        return self._views[name]
+
+    def encoded(self, name: str, builder: Callable[["PermissionSnapshot"], Any]) -> bytes:
+        """获取派生视图包装为成功响应后的 JSON 字节"""
+        data = self._encoded.get(name)
+        if data is None:
+            data = self._encoded[name] = ResponseModel.encode(ResponseModel.success(self.view(name, builder)))
+        return data
+
+
+class PermissionCache:
+    """权限表快照缓存
+
+    创建、更新、删除权限时递增全局版本号（Redis）并通过缓存失效通道广播，
+    各进程在下次访问时重新加载整张权限表；热路径只比较内存中的版本号。
+
+    与授权版本号相同，版本号只比较是否相等：Redis 中的版本号丢失后从随机起点重新计数，
+    不会重复使用旧的版本号，旧版本的快照和 ETag 都不会被误认为是最新的。
+    """
+
+    VERSION_KEY = "permission:version"
+
+    def __init__(self):
+        self.version = 0
+        self.snapshot: Optional[PermissionSnapshot] = None
+        self.lock = asyncio.Lock()
+        self.loads = 0
+
+    def _on_version(self, version) -> None:
+        """收到新的权限版本号"""
+        version = int(version)
+        if version != self.version:
+            self.version = version
+
+    def _is_fresh(self, snapshot: Optional[PermissionSnapshot]) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.version == self.version
+            and time.monotonic() - snapshot.loaded_at < settings.PERMISSION_CACHE_TTL
+        )
+
+    async def sync_version(self) -> int:
+        """从 Redis 同步当前权限版本号"""
+        try:
+            version = await redis_client.get(self.VERSION_KEY)
+            if version is not None:
+                self._on_version(version)
+        except Exception as e:
+            logger.warning(f"同步权限版本号失败: {e}")
+        return self.version
+
+    async def bump(self) -> int:
+        """递增权限版本号，使所有进程的权限快照失效（需在写入完成后调用）"""
+        try:
+            # 版本号不存在（首次使用或 Redis 数据丢失）时从随机起点开始计数
+            await redis_client.set(self.VERSION_KEY, str(random.randrange(1 << 32, 1 << 48)), nx=True)
+            version = await redis_client.incr(self.VERSION_KEY)
+        except Exception as e:
+            logger.warning(f"递增权限版本号失败: {e}")
+            version = self.version + 1
+
+        await cache_bus.publish("permission", version)
+        return version
+
+    async def get(self) -> PermissionSnapshot:
+        """获取当前版本的权限表快照"""
+        snapshot = self.snapshot
+        if self._is_fresh(snapshot):
+            return snapshot
+
+        async with self.lock:
+            # 等待锁期间其他协程可能已完成加载
+            if self._is_fresh(self.snapshot):
+                return self.snapshot
+
+            # 先记录版本号再查询数据库，加载期间发生的变更会使快照在下次访问时重新加载
+            version = self.version
+            rows = await Permission.all().values(*PERMISSION_FIELDS)
+            self.snapshot = PermissionSnapshot(version, rows)
+            self.loads += 1
+            return self.snapshot
+
+    def metrics(self) -> Dict[str, Any]:
+        """运行指标"""
+        snapshot = self.snapshot
+        return {
+            "version": self.version,
+            "snapshotVersion": snapshot.version if snapshot is not None else None,
+            "rows": len(snapshot.rows) if snapshot is not None else 0,
+            "loads": self.loads,
+        }
+
+
+# 创建权限快照缓存实例
+permission_cache = PermissionCache()
+
+# 其他进程修改权限后，同步本进程的权限版本号
+cache_bus.register("permission", permission_cache._on_version)
+# 订阅建立或断线重连后，补上订阅断开期间可能错过的版本号变更
+cache_bus.on_connect(permission_cache.sync_version)
@@ -0,0 +1,118 @@
+from app.core.redis import redis_client
+from app.core.config import settings
+from app.services.permission_cache import permission_cache, PERMISSION_FIELDS
+from typing import Any, Dict, List, Optional
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 追加变更记录：递增变更版本号，写入有序集合（分值为版本号）并裁剪到保留条数，返回新版本号
+APPEND_SCRIPT = """
+local version = redis.call('INCR', KEYS[2])
+redis.call('ZADD', KEYS[1], version, version .. ':' .. ARGV[1])
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[2]) + 1))
+return version
+"""
+
+
+class PermissionChangeLog:
+    """权限变更日志
+
+    PermissionService 对权限的新增、修改、删除以及 RoleService 对角色权限分配的修改，
+    每次都分配一个递增的变更版本号并记录到 Redis 有序集合中，只保留最近的若干条。
+    客户端携带上次同步的版本号获取增量；版本号早于保留范围时返回完整快照。
+    """
+
+    KEY = "permission:changes"
+    VERSION_KEY = "permission:changes:version"
+
+    def __init__(self):
+        self.script = None
+
+    async def record(self, op: str, permission_id: Optional[int] = None, role_id: Optional[int] = None):
+        """记录一次变更（需在事务提交、权限版本号递增之后调用）
+
+        op: insert、update、delete（权限节点），role（角色权限分配）
+        """
+        payload = json.dumps({"op": op, "id": permission_id, "roleId": role_id}, separators=(",", ":"))
+        try:
+            if self.script is None:
+                self.script = redis_client.client.register_script(APPEND_SCRIPT)
+            await self.script(keys=[self.KEY, self.VERSION_KEY], args=[payload, settings.PERMISSION_CHANGES_RETENTION])
+        except Exception as e:
+            # 记录失败时客户端无法得到这次增量，递增版本号使其回退到完整快照
+            logger.warning(f"记录权限变更失败: {e}")
+            try:
+                await redis_client.incr(self.VERSION_KEY)
+            except Exception:
+                pass
+
+    async def _entries_since(self, version: int) -> Optional[List[Dict[str, Any]]]:
+        """读取指定版本之后的变更记录，记录不连续（超出保留范围或丢失）时返回 None"""
+        members = await redis_client.client.zrangebyscore(self.KEY, f"({version}", "+inf")
+        entries = []
+        expected = version + 1
+        for member in members:
+            member = member.decode() if isinstance(member, bytes) else member
+            entry_version, payload = member.split(":", 1)
+            if int(entry_version) != expected:
+                return None
+            entries.append(json.loads(payload))
+            expected += 1
+        return entries
+
+    async def get_changes(self, since: int) -> Dict[str, Any]:
+        """获取指定版本之后的权限变更"""
+        current = int(await redis_client.get(self.VERSION_KEY) or 0)
+
+        entries = None
+        if 0 <= since <= current:
+            entries = await self._entries_since(since)
+            if entries is not None and since + len(entries) < current:
+                entries = None
+
+        # 读取变更记录之后再同步权限版本号，保证快照包含已读取到的全部变更
+        await permission_cache.sync_version()
+        snapshot = await permission_cache.get()
+
+        if entries is None:
+            return {
+                "version": current,
+                "full": True,
+                "nodes": [{field: row[field] for field in PERMISSION_FIELDS} for row in snapshot.rows],
+            }
+
+        # 合并同一节点的多次变更：以窗口内首次操作和当前是否存在判断最终结果
+        first_ops: Dict[int, str] = {}
+        role_ids = []
+        for entry in entries:
+            if entry["op"] == "role":
+                if entry["roleId"] not in role_ids:
+                    role_ids.append(entry["roleId"])
+            elif entry["id"] is not None:
+                first_ops.setdefault(entry["id"], entry["op"])
+
+        rows = {row["id"]: row for row in snapshot.rows}
+        inserted, updated, removed = [], [], []
+        for permission_id, first_op in first_ops.items():
+            row = rows.get(permission_id)
+            if row is None:
+                if first_op != "insert":
+                    removed.append(permission_id)
+                continue
+            node = {field: row[field] for field in PERMISSION_FIELDS}
+            (inserted if first_op == "insert" else updated).append(node)
+
+        return {
+            "version": since + len(entries),
+            "full": False,
+            "inserted": inserted,
+            "updated": updated,
+            "removed": removed,
+            "roleIds": role_ids,
+        }
+
+
+# 创建权限变更日志实例
+permission_change_log = PermissionChangeLog()
@@ -0,0 +1,129 @@
+from app.models.permission import Permission, PermissionClosure
+from app.utils.exceptions import CustomException, ErrorCode
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PermissionClosureService:
+    """权限闭包表维护
+
+    闭包表为每个权限记录其全部祖先（包括自身，depth=0），子树、祖先链查询都是一次索引查询；
+    修改上级权限前只需检查新的上级是否在当前权限的子树中即可拒绝循环引用。
+    以下方法需要与权限表的写入放在同一事务中调用。
+    """
+
+    @staticmethod
+    async def get_ancestor_depths(permission_id: int) -> Dict[int, int]:
+        """获取祖先ID -> 距离（包括自身）"""
+        rows = await PermissionClosure.filter(descendant_id=permission_id).values_list("ancestor_id", "depth")
+        return dict(rows)
+
+    @staticmethod
+    async def get_descendant_depths(permission_id: int) -> Dict[int, int]:
+        """获取子孙ID -> 距离（包括自身）"""
+        rows = await PermissionClosure.filter(ancestor_id=permission_id).values_list("descendant_id", "depth")
+        return dict(rows)
+
+    @staticmethod
+    async def check_parent(permission_id: int, parent_id: Optional[int]):
+        """检查上级权限是否合法：不能是自身或其子孙
+
+        需在修改上级的事务中调用。只锁定与树深度成正比的记录，不锁定被移动权限的整棵子树：
+        当前权限和新上级的祖先链，以及链上每个祖先自身（depth=0）的记录。两次并发移动能组成循环时
+        （如 A 移到 B 下、B 移到 A 下），其中一方的上级必然在另一方被移动权限的子树中，
+        双方都会锁定后者自身的记录而串行执行，后执行的一方读到前者提交后的闭包关系。
+        """
+        if parent_id is None:
+            return
+        if parent_id == permission_id:
+            raise CustomException(ErrorCode.ERR_13003)
+
+        # 加锁读取读到的是最新提交的数据，检查结果直接使用锁定的记录
+        chain = await PermissionClosure.filter(
+            descendant_id__in=[permission_id, parent_id]
+        ).select_for_update().only("id", "ancestor_id", "descendant_id")
+        ancestor_ids = list({row.ancestor_id for row in chain})
+        await PermissionClosure.filter(
+            descendant_id__in=ancestor_ids, depth=0
+        ).select_for_update().only("id")
+        if any(row.ancestor_id == permission_id and row.descendant_id == parent_id for row in chain):
+            raise CustomException(ErrorCode.ERR_13003)
+
+    @staticmethod
+    async def insert_node(permission_id: int, parent_id: Optional[int]):
+        """新增权限：继承上级的全部祖先"""
+        records = [PermissionClosure(ancestor_id=permission_id, descendant_id=permission_id, depth=0)]
+        if parent_id is not None:
+            ancestors = await PermissionClosureService.get_ancestor_depths(parent_id)
+            records.extend(
+                PermissionClosure(ancestor_id=ancestor_id, descendant_id=permission_id, depth=depth + 1)
+                for ancestor_id, depth in ancestors.items()
+            )
+        await PermissionClosure.bulk_create(records)
+
+    @staticmethod
+    async def _detach_subtree(permission_id: int) -> Dict[int, int]:
+        """断开子树与原祖先的关系，返回子树节点ID -> 距离"""
+        subtree = await PermissionClosureService.get_descendant_depths(permission_id)
+        ancestors = await PermissionClosureService.get_ancestor_depths(permission_id)
+        ancestors.pop(permission_id, None)
+        if ancestors:
+            await PermissionClosure.filter(
+                descendant_id__in=list(subtree), ancestor_id__in=list(ancestors)
+            ).delete()
+        return subtree
+
+    @staticmethod
+    async def move_node(permission_id: int, parent_id: Optional[int]):
+        """修改上级权限：子树整体移动到新的上级下（调用前需在同一事务中先执行 check_parent）"""
+        subtree = await PermissionClosureService._detach_subtree(permission_id)
+        if parent_id is None:
+            return
+
+        ancestors = await PermissionClosureService.get_ancestor_depths(parent_id)
+        records = [
+            PermissionClosure(ancestor_id=ancestor_id, descendant_id=descendant_id, depth=up + down + 1)
+            for ancestor_id, up in ancestors.items()
+            for descendant_id, down in subtree.items()
+        ]
+        if records:
+            await PermissionClosure.bulk_create(records, batch_size=1000)
+
+    @staticmethod
+    async def delete_node(permission_id: int):
+        """删除权限：下级权限与原祖先断开（成为孤儿节点），并删除该权限自身的关系"""
+        await PermissionClosureService._detach_subtree(permission_id)
+        await PermissionClosure.filter(ancestor_id=permission_id).delete()
+        await PermissionClosure.filter(descendant_id=permission_id).delete()
+
+    @staticmethod
+    async def rebuild() -> int:
+        """根据权限表重建闭包表，返回写入的记录数"""
+        parents = dict(await Permission.all().values_list("id", "parent_id"))
+
+        records: List[PermissionClosure] = []
+        for permission_id in parents:
+            # 沿上级链向上，遇到不存在的上级或循环时停止
+            depth, current, visited = 0, permission_id, set()
+            while current is not None and current in parents and current not in visited:
+                visited.add(current)
+                records.append(PermissionClosure(ancestor_id=current, descendant_id=permission_id, depth=depth))
+                current = parents[current]
+                depth += 1
+            if current is not None and current in visited:
+                logger.warning(f"权限 {permission_id} 的上级链存在循环，已在 {current} 处截断")
+
+        await PermissionClosure.all().delete()
+        if records:
+            await PermissionClosure.bulk_create(records, batch_size=1000)
+        return len(records)
+
+    @staticmethod
+    async def ensure():
+        """闭包表为空而权限表有数据时（如通过 SQL 导入数据），重建闭包表"""
+        if await PermissionClosure.all().exists() or not await Permission.all().exists():
+            return
+        count = await PermissionClosureService.rebuild()
+        logger.info(f"已重建权限闭包表，记录数: {count}")
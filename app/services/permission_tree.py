@@ -0,0 +1,180 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# 菜单树节点字段
+MENU_FIELDS = (
+    "id", "name", "code", "type", "parent_id", "path", "redirect", "icon", "component",
+    "layout", "keep_alive", "enable", "show", "order",
+)
+
+RowFilter = Callable[[Dict[str, Any]], bool]
+
+
+def _sort_key(row: Dict[str, Any]):
+    """排序规则：order 升序，空值排在最前（与 MySQL 一致），相同时按 id 升序"""
+    order = row["order"]
+    return (order is not None, order or 0, row["id"])
+
+
+class PermissionTreeIndex:
+    """权限树索引
+
+    一次扫描建立 id -> 行、父节点 -> 有序子节点列表 的索引，各种权限树视图都是在索引上
+    按条件过滤生成的，不再重复查询和连接父子关系。
+
+    - 父节点不存在的节点记为孤儿节点（orphans），不出现在任何视图中；
+    - 父子关系成环的节点从根节点不可达，记为 unreachable，同样不出现在视图中。
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]], root_id: Optional[int] = None):
+        """root_id: 以指定节点为根建立索引（用于只包含某个子树的数据），该节点的上级被忽略"""
+        self.nodes: Dict[int, Dict[str, Any]] = {}
+        # 父节点ID -> 子节点ID列表，None 对应根节点
+        self.children: Dict[Optional[int], List[int]] = {None: []}
+
+        ordered = sorted(rows, key=_sort_key)
+        for row in ordered:
+            self.nodes[row["id"]] = row
+
+        self.orphans: List[int] = []
+        for row in ordered:
+            parent_id = None if row["id"] == root_id else row["parent_id"]
+            if parent_id is not None and parent_id not in self.nodes:
+                self.orphans.append(row["id"])
+                continue
+            self.children.setdefault(parent_id, []).append(row["id"])
+
+        reachable = self._count_reachable()
+        self.unreachable: List[int] = []
+        if reachable + len(self.orphans) < len(self.nodes):
+            self.unreachable = self._find_unreachable()
+
+        if self.orphans or self.unreachable:
+            logger.warning(
+                f"权限树存在无法挂载的节点，孤儿节点: {self.orphans[:20]}，成环节点: {self.unreachable[:20]}"
+            )
+
+    def _walk(self, parent_id: Optional[int]):
+        """深度优先遍历子孙节点ID（迭代实现，不受递归深度限制）"""
+        stack = list(reversed(self.children.get(parent_id, ())))
+        while stack:
+            node_id = stack.pop()
+            yield node_id
+            stack.extend(reversed(self.children.get(node_id, ())))
+
+    def _count_reachable(self) -> int:
+        count = 0
+        for _ in self._walk(None):
+            count += 1
+        return count
+
+    def _find_unreachable(self) -> List[int]:
+        visited = set(self._walk(None))
+        orphans = set(self.orphans)
+        for orphan_id in self.orphans:
+            visited.update(self._walk(orphan_id))
+        return [node_id for node_id in self.nodes if node_id not in visited and node_id not in orphans]
+
+    def get_children(self, parent_id: Optional[int]) -> List[Dict[str, Any]]:
+        """获取有序的直接子节点"""
+        return [self.nodes[node_id] for node_id in self.children.get(parent_id, ())]
+
+    def build(self, fields: Sequence[str], predicate: Optional[RowFilter] = None,
+              root_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """生成嵌套树
+
+        fields: 节点保留的字段
+        predicate: 节点过滤条件，不满足条件的节点及其子孙都不出现在结果中
+        root_id: 从指定节点的子节点开始生成，默认从根节点开始
+        """
+        roots: List[Dict[str, Any]] = []
+        # 广度优先生成，子节点列表已有序
+        queue = [(root_id, roots)]
+        for parent_id, siblings in queue:
+            for node_id in self.children.get(parent_id, ()):
+                row = self.nodes[node_id]
+                if predicate is not None and not predicate(row):
+                    continue
+                node = {field: row[field] for field in fields}
+                node["children"] = []
+                siblings.append(node)
+                queue.append((node_id, node["children"]))
+        return roots
+
+    def stats(self) -> Dict[str, Any]:
+        """索引统计"""
+        return {
+            "nodes": len(self.nodes),
+            "orphans": len(self.orphans),
+            "unreachable": len(self.unreachable),
+        }
+
+
+def is_menu(row: Dict[str, Any]) -> bool:
+    return row["type"] == "MENU"
+
+
+def is_visible_menu(row: Dict[str, Any]) -> bool:
+    return row["type"] == "MENU" and bool(row["enable"]) and bool(row["show"])
+
+
+class MenuPathIndex:
+    """菜单路径索引
+
+    静态路径使用哈希表精确匹配；含动态参数的路径（如 /pms/role/user/:roleId）编译为正则，
+    精确匹配失败时再依次匹配。路径重复时以 id 最小的菜单为准。
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self.exact: Dict[str, Dict[str, Any]] = {}
+        self.patterns: List[Tuple[Pattern, Dict[str, Any]]] = []
+
+        seen = set()
+        for row in sorted(rows, key=lambda item: item["id"]):
+            path = row["path"]
+            if row["type"] != "MENU" or not path:
+                continue
+            path = _normalize_path(path)
+            if path in seen:
+                continue
+            seen.add(path)
+
+            if ":" in path or "*" in path:
+                self.patterns.append((_compile_path(path), row))
+            else:
+                self.exact[path] = row
+
+    def match(self, path: str) -> Optional[Dict[str, Any]]:
+        """查找路径对应的菜单"""
+        path = _normalize_path(path)
+        row = self.exact.get(path)
+        if row is not None:
+            return row
+        for pattern, row in self.patterns:
+            if pattern.fullmatch(path):
+                return row
+        return None
+
+
+def _normalize_path(path: str) -> str:
+    """去掉查询参数、锚点和末尾斜杠"""
+    path = path.split("?", 1)[0].split("#", 1)[0]
+    if len(path) > 1:
+        path = path.rstrip("/")
+    return path
+
+
+def _compile_path(path: str) -> Pattern:
+    """将前端路由路径编译为正则：:param 匹配单段，* 或 :param(.*) 匹配任意剩余部分"""
+    parts = []
+    for segment in path.split("/"):
+        if segment == "*" or segment.endswith("(.*)") or segment.endswith("(.*)*"):
+            parts.append(".*")
+        elif segment.startswith(":"):
+            parts.append("[^/]+")
+        else:
+            parts.append(re.escape(segment))
+    return re.compile("/".join(parts))
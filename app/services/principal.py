@@ -0,0 +1,116 @@
+from app.models.user import User
+from app.schemas.user import Principal
+from app.core.cache import LRUCache, cache_bus
+from app.core.redis import redis_client
+from app.core.config import settings
+from typing import Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 版本号未变化时才写入用户缓存：KEYS[1] 版本号，KEYS[2] 缓存键；ARGV 为查询前读到的版本号、缓存内容、过期时间
+SET_IF_VERSION_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+# 查询数据库期间用户被修改时的重试次数
+LOAD_ATTEMPTS = 3
+
+# 本地缓存：用户ID -> Principal
+principal_cache = LRUCache(maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL)
+
+# 其他进程修改用户后，清理本进程的本地缓存
+cache_bus.register("principal", lambda user_id: principal_cache.delete(int(user_id)))
+
+
+class PrincipalService:
+    _set_script = None
+
+    @staticmethod
+    def _redis_key(user_id: int) -> str:
+        return f"principal:{user_id}"
+
+    @staticmethod
+    def _version_key(user_id: int) -> str:
+        return f"principal:version:{user_id}"
+
+    @staticmethod
+    async def get_principal(user_id: int) -> Optional[Principal]:
+        """获取当前用户信息，依次查询本地缓存、Redis、数据库"""
+        principal = principal_cache.get(user_id)
+        if principal is not None:
+            return principal
+
+        key = PrincipalService._redis_key(user_id)
+        try:
+            cached = await redis_client.get(key)
+        except Exception as e:
+            logger.warning(f"读取用户缓存失败: {e}")
+            cached = None
+
+        if cached:
+            principal = Principal.model_validate_json(cached)
+        else:
+            principal, stored = await PrincipalService._load(user_id)
+            if principal is None or not stored:
+                # 用户不存在，或多次查询期间都被修改：不写入本地缓存，下次请求重新读取
+                return principal
+
+        principal_cache.set(user_id, principal)
+        return principal
+
+    @staticmethod
+    async def _load(user_id: int) -> Tuple[Optional[Principal], bool]:
+        """从数据库读取用户并写入 Redis，返回 (用户信息, 是否可以缓存)
+
+        先读版本号再查询数据库，写入时版本号已变化说明查询期间执行了 invalidate，
+        查到的可能是旧数据，放弃写入并重新查询，避免旧数据以新版本号写入缓存。
+        """
+        version_key = PrincipalService._version_key(user_id)
+        for _ in range(LOAD_ATTEMPTS):
+            try:
+                version = int(await redis_client.get(version_key) or 0)
+            except Exception as e:
+                logger.warning(f"读取用户版本号失败: {e}")
+                version = None
+
+            user = await User.filter(id=user_id).first()
+            if not user:
+                return None, False
+
+            principal = Principal(id=user.id, username=user.username, enable=user.enable, version=version or 0)
+            if version is None:
+                # Redis 不可用，只使用本地缓存
+                return principal, True
+
+            try:
+                if PrincipalService._set_script is None:
+                    PrincipalService._set_script = redis_client.client.register_script(SET_IF_VERSION_SCRIPT)
+                stored = await PrincipalService._set_script(
+                    keys=[version_key, PrincipalService._redis_key(user_id)],
+                    args=[version, principal.model_dump_json(), settings.PRINCIPAL_REDIS_TTL],
+                )
+            except Exception as e:
+                logger.warning(f"写入用户缓存失败: {e}")
+                return principal, True
+            if stored:
+                return principal, True
+
+        return principal, False
+
+    @staticmethod
+    async def invalidate(user_id: int):
+        """用户信息变更后递增版本号并清除缓存"""
+        try:
+            pipe = redis_client.client.pipeline(transaction=True)
+            pipe.incr(PrincipalService._version_key(user_id))
+            pipe.delete(PrincipalService._redis_key(user_id))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"删除用户缓存失败: {e}")
+
+        await cache_bus.publish("principal", user_id)
@@ -1,11 +1,38 @@
 from app.models.role import Role
 from app.models.permission import Permission
-from app.models.user import User
+from app.models.user import User, DEFAULT_AVATAR
 from app.schemas.role import RoleCreate, RoleUpdate
 from app.utils.exceptions import CustomException, ErrorCode
-from typing import List, Optional, Dict, Any
-from tortoise.transactions import atomic
+from app.utils.response import ResponseModel
+from app.utils.pagination import keyset_query, keyset_page
+from app.utils.projection import Projection, isoformat
+from typing import List, Optional, Dict, Any, Tuple
+from tortoise.transactions import in_transaction
 from tortoise.functions import Count
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.services.authz import AuthzService
+from app.services.stats import stats_counters, role_deltas
+from app.services.list_count import list_counter
+from app.services.search import search_index, fulltext_filter
+from app.services.permission_changes import permission_change_log
+from app.services.permission_cache import permission_cache, PERMISSION_FIELDS
+
+# 角色组合权限树缓存：(授权版本, 权限版本, 角色ID组合) -> (权限树, 响应字节)
+role_tree_cache = LRUCache(maxsize=settings.ROLE_TREE_CACHE_SIZE)
+
+# 查询结果投影，只选取响应需要的列
+ROLE_ITEM = Projection("id", "code", "name", "enable")
+# 以下为从角色一侧沿关联查询的投影
+ROLE_PERMISSION_ITEM = Projection("id", "code", "name", "type", "parent_id").related("permissions")
+ROLE_PERMISSION_BRIEF_ITEM = Projection("id", "name", "code", "type").related("permissions")
+# 头像字段不可为空，为 None 说明用户没有资料记录，与用户列表一致使用默认头像
+ROLE_USER_ITEM = Projection(
+    "id", "username",
+    email="profile__email", avatar="profile__avatar", gender="profile__gender",
+    enable="enable", createTime="create_time",
+    converters={"createTime": isoformat, "avatar": lambda avatar: avatar or DEFAULT_AVATAR},
+).related("users")
 
 class RoleService:
     @staticmethod
@@ -27,6 +54,9 @@ class RoleService:
             name=role_data.name,
             enable=role_data.enable
         )
+        await stats_counters.incr(role_deltas(role))
+        await list_counter.invalidate("role")
+        await search_index.upsert("role", role)
         
         return role
     
@@ -43,6 +73,7 @@ class RoleService:
             raise CustomException(ErrorCode.ERR_12001)
         
         update_data = role_data.dict(exclude_unset=True)
+        was_enabled = role.enable
         if update_data:
             # 检查名称是否已存在
             if "name" in update_data and update_data["name"] != role.name:
@@ -51,6 +82,12 @@ class RoleService:
                     raise CustomException(ErrorCode.ERR_12002)
             
             await role.update_from_dict(update_data).save()
+            await AuthzService.bump()
+            await permission_change_log.record("role", role_id=role_id)
+            await list_counter.invalidate("role")
+            await search_index.upsert("role", role)
+            if role.enable != was_enabled:
+                await stats_counters.incr({"role:active": 1 if role.enable else -1})
         
         return role
     
@@ -62,56 +99,56 @@ class RoleService:
             raise CustomException(ErrorCode.ERR_12001)
         
         await role.delete()
+        await AuthzService.bump()
+        await permission_change_log.record("role", role_id=role_id)
+        await stats_counters.incr(role_deltas(role, -1))
+        await list_counter.invalidate("role")
+        await search_index.remove("role", role_id)
         return True
     
     @staticmethod
     async def get_role_permissions(role_id: int) -> List[Dict[str, Any]]:
         """获取角色权限"""
-        role = await Role.filter(id=role_id).prefetch_related("permissions").first()
-        if not role:
+        permissions = await ROLE_PERMISSION_ITEM.all(Role.filter(id=role_id))
+        if permissions is None:
             raise CustomException(ErrorCode.ERR_12001)
         
-        # 将 Permission 对象转换为字典
-        permissions = []
-        for permission in role.permissions:
-            permissions.append({
-                "id": permission.id,
-                "code": permission.code,
-                "name": permission.name,
-                "type": permission.type,
-                "parent_id": permission.parent_id
-            })
-        
         return permissions
     
     @staticmethod
-    @atomic()
     async def add_role_permissions(role_id: int, permission_ids: List[int]) -> Role:
         """添加角色权限"""
-        role = await Role.filter(id=role_id).first()
-        if not role:
-            raise CustomException(ErrorCode.ERR_12001)
-        
-        permissions = await Permission.filter(id__in=permission_ids).all()
-        await role.permissions.add(*permissions)
+        async with in_transaction():
+            role = await Role.filter(id=role_id).first()
+            if not role:
+                raise CustomException(ErrorCode.ERR_12001)
+            
+            permissions = await Permission.filter(id__in=permission_ids).all()
+            await role.permissions.add(*permissions)
         
+        # 事务提交后再使授权快照失效
+        await AuthzService.bump()
+        await permission_change_log.record("role", role_id=role_id)
         return role
     
     @staticmethod
-    @atomic()
     async def set_role_permissions(role_id: int, permission_ids: List[int]) -> Role:
         """设置角色权限（替换现有权限）"""
-        role = await Role.filter(id=role_id).first()
-        if not role:
-            raise CustomException(ErrorCode.ERR_12001)
-        
-        # 清除现有权限
-        await role.permissions.clear()
-        
-        # 添加新权限
-        permissions = await Permission.filter(id__in=permission_ids).all()
-        await role.permissions.add(*permissions)
+        async with in_transaction():
+            role = await Role.filter(id=role_id).first()
+            if not role:
+                raise CustomException(ErrorCode.ERR_12001)
+            
+            # 清除现有权限
+            await role.permissions.clear()
+            
+            # 添加新权限
+            permissions = await Permission.filter(id__in=permission_ids).all()
+            await role.permissions.add(*permissions)
         
+        # 事务提交后再使授权快照失效
+        await AuthzService.bump()
+        await permission_change_log.record("role", role_id=role_id)
         return role
     
     @staticmethod
@@ -120,36 +157,44 @@ class RoleService:
         page_size: int = 10, 
         code: Optional[str] = None,
         name: Optional[str] = None,
-        enable: Optional[bool] = None
+        enable: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact"
     ) -> Dict[str, Any]:
-        """获取角色列表"""
+        """获取角色列表
+
+        cursor 不为 None 时使用游标分页（按 id 排序），空字符串表示第一页
+        total_mode: 总数计算方式，exact 精确计数（带缓存），estimate 估算，none 不计算
+        """
         query = Role.all()
         
         if code:
-            query = query.filter(code__contains=code)
+            query = fulltext_filter.contains(query, "code", code)
         
         if name:
-            query = query.filter(name__contains=name)
+            query = fulltext_filter.contains(query, "name", name)
         
         if enable is not None:
             query = query.filter(enable=enable)
         
-        total = await query.count()
-        roles = await query.offset((page - 1) * page_size).limit(page_size).all()
-        
-        # 将 Role 对象转换为字典
-        role_list = []
-        for role in roles:
-            role_list.append({
-                "id": role.id,
-                "code": role.code,
-                "name": role.name,
-                "enable": role.enable
-            })
+        if cursor is not None:
+            role_list, next_cursor = keyset_page(await ROLE_ITEM.all(keyset_query(query, page_size, cursor)), page_size)
+        else:
+            total = await list_counter.total(query, {"code": code, "name": name, "enable": enable}, total_mode)
+            role_list = await ROLE_ITEM.all(query.offset((page - 1) * page_size).limit(page_size))
+        
+        if cursor is not None:
+            return {
+                "items": role_list,
+                "nextCursor": next_cursor,
+                "hasMore": next_cursor is not None,
+                "page_size": page_size
+            }
         
         return {
             "items": role_list,
             "total": total,
+            "totalMode": total_mode,
             "page": page,
             "page_size": page_size
         }
@@ -160,158 +205,130 @@ class RoleService:
         page_size: int = 10, 
         code: Optional[str] = None,
         name: Optional[str] = None,
-        enable: Optional[bool] = None
+        enable: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact"
     ) -> Dict[str, Any]:
-        """获取角色列表（包含权限ID）"""
+        """获取角色列表（包含权限ID）
+
+        cursor 不为 None 时使用游标分页（按 id 排序），空字符串表示第一页
+        total_mode: 总数计算方式，exact 精确计数（带缓存），estimate 估算，none 不计算
+        """
         query = Role.all()
         
         if code:
-            query = query.filter(code__contains=code)
+            query = fulltext_filter.contains(query, "code", code)
         
         if name:
-            query = query.filter(name__contains=name)
+            query = fulltext_filter.contains(query, "name", name)
         
         if enable is not None:
             query = query.filter(enable=enable)
         
-        total = await query.count()
-        roles = await query.prefetch_related("permissions").offset((page - 1) * page_size).limit(page_size).all()
-        
-        # 将 Role 对象转换为字典，并包含权限ID
-        role_list = []
-        for role in roles:
-            permission_ids = [p.id for p in role.permissions]
-            role_list.append({
-                "id": role.id,
-                "code": role.code,
-                "name": role.name,
-                "enable": role.enable,
-                "permissionIds": permission_ids
-            })
+        if cursor is not None:
+            role_list, next_cursor = keyset_page(await ROLE_ITEM.all(keyset_query(query, page_size, cursor)), page_size)
+        else:
+            total = await list_counter.total(query, {"code": code, "name": name, "enable": enable}, total_mode)
+            role_list = await ROLE_ITEM.all(query.offset((page - 1) * page_size).limit(page_size))
+        
+        # 一次查询当前页全部角色的权限ID
+        permission_ids: Dict[int, List[int]] = {role["id"]: [] for role in role_list}
+        if permission_ids:
+            pairs = await Role.filter(id__in=list(permission_ids)).order_by("permissions__id").values_list(
+                "id", "permissions__id"
+            )
+            for role_id, permission_id in pairs:
+                if permission_id is not None:
+                    permission_ids[role_id].append(permission_id)
+        for role in role_list:
+            role["permissionIds"] = permission_ids[role["id"]]
+        
+        if cursor is not None:
+            return {
+                "pageData": role_list,
+                "nextCursor": next_cursor,
+                "hasMore": next_cursor is not None
+            }
         
         return {
             "pageData": role_list,
-            "total": total
+            "total": total,
+            "totalMode": total_mode
         }
     
     @staticmethod
     async def get_role_detail(role_id: int) -> Dict[str, Any]:
         """获取角色详情"""
-        role = await Role.filter(id=role_id).prefetch_related("permissions").first()
+        role = await ROLE_ITEM.first(Role.filter(id=role_id))
         if not role:
             raise CustomException(ErrorCode.ERR_12001)
         
-        permissions = [
-            {
-                "id": permission.id,
-                "name": permission.name,
-                "code": permission.code,
-                "type": permission.type
-            } 
-            for permission in role.permissions
-        ]
-        
-        return {
-            "id": role.id,
-            "code": role.code,
-            "name": role.name,
-            "enable": role.enable,
-            "permissions": permissions
-        }
+        role["permissions"] = await ROLE_PERMISSION_BRIEF_ITEM.all(Role.filter(id=role_id)) or []
+        return role
         
     @staticmethod
-    async def get_role_permissions_tree(current_user) -> List[Dict[str, Any]]:
-        """获取角色权限树"""
-        from app.services.permission import PermissionService
-
-        # 获取所有权限树
-        permission_tree = await PermissionService.get_permission_tree()
+    async def _get_role_set_tree(current_user) -> Tuple[List[Dict[str, Any]], bytes]:
+        """获取当前用户角色组合对应的权限树及其响应字节
 
-        # 获取当前用户的角色
-        await current_user.fetch_related("roles")
-        user_roles = current_user.roles
+        角色组合相同的用户共享同一份缓存；授权版本或权限版本变化后缓存键随之变化。
+        """
+        from app.services.permission import PermissionService, get_tree_index
 
-        # **修正1：获取所有角色代码**
-        user_role_codes = [role.code for role in user_roles]
-        print("用户角色:", user_role_codes)
+        # 先记录版本号再查询，查询期间发生的变更会写入旧版本的缓存键，不影响后续请求
+        authz_version = AuthzService.version
+        snapshot = await AuthzService.get_snapshot(current_user.id)
+        permissions = await permission_cache.get()
 
-        # **修正2：获取所有角色的权限**
-        roles = await Role.filter(code__in=user_role_codes).prefetch_related("permissions")
-        if not roles:
-            return permission_tree
+        key = (authz_version, permissions.version, tuple(snapshot.role_ids))
+        entry = role_tree_cache.get(key)
+        if entry is not None:
+            return entry
 
-        # **修正3：合并所有角色的权限ID**
-        user_permission_ids = set()
-        for role in roles:
-            for perm in role.permissions:
-                user_permission_ids.add(perm.id)  # 记录所有权限ID
+        if not snapshot.role_ids:
+            # 没有角色的用户返回完整权限树
+            tree = await PermissionService.get_permission_tree()
+            encoded = await PermissionService.get_encoded_tree("permission_tree")
+        else:
+            permission_ids = set(
+                await Permission.filter(roles__id__in=snapshot.role_ids).distinct().values_list("id", flat=True)
+            )
+            # 只保留拥有权限的节点，父节点无权限时其子孙节点也不显示
+            tree = get_tree_index(permissions).build(PERMISSION_FIELDS, lambda row: row["id"] in permission_ids)
+            encoded = ResponseModel.encode(ResponseModel.success(tree))
 
-        print("用户权限ID:", user_permission_ids)
+        entry = (tree, encoded)
+        role_tree_cache.set(key, entry)
+        return entry
 
-        # 递归标记权限树
-        def mark_permissions(nodes, permission_ids):
-            result = []
-            for node in nodes:
-                if node["id"] in permission_ids:
-                    node_copy = node.copy()
-                    if "children" in node and node["children"]:
-                        node_copy["children"] = mark_permissions(node["children"], permission_ids)
-                    result.append(node_copy)
-            return result
+    @staticmethod
+    async def get_role_permissions_tree(current_user) -> List[Dict[str, Any]]:
+        """获取角色权限树（共享只读数据，调用方不可修改）"""
+        tree, _ = await RoleService._get_role_set_tree(current_user)
+        return tree
 
-        return mark_permissions(permission_tree, user_permission_ids)
+    @staticmethod
+    async def get_encoded_role_permissions_tree(current_user) -> bytes:
+        """获取角色权限树包装为成功响应后的 JSON 字节"""
+        _, encoded = await RoleService._get_role_set_tree(current_user)
+        return encoded
     
     @staticmethod
     async def get_role_stats() -> Dict[str, Any]:
         """获取角色统计数据"""
-        # 获取所有角色
-        roles = await Role.all()
-        
-        # 获取所有用户
-        users = await User.all().prefetch_related('roles')
-        
-        # 获取所有权限
-        permissions = await Permission.all()
-        
-        # 初始化统计数据
-        total = len(roles)
-        active = 0
-        users_count = len(users)
-        permissions_count = len(permissions)
-        
-        # 统计启用的角色数量
-        for role in roles:
-            if role.enable:
-                active += 1
-        
-        # 返回统计结果
+        counters = await stats_counters.get()
         return {
-            "total": total,
-            "active": active,
-            "users": users_count,
-            "permissions": permissions_count
+            "total": counters["role:total"],
+            "active": counters["role:active"],
+            "users": counters["user:total"],
+            "permissions": counters["permission:total"]
         }
     
     @staticmethod
     async def get_role_users(role_id: int) -> List[Dict[str, Any]]:
         """获取角色用户列表"""
         # 获取角色
-        role = await Role.filter(id=role_id).first().prefetch_related('users')
-        if not role:
+        users = await ROLE_USER_ITEM.all(Role.filter(id=role_id))
+        if users is None:
             raise CustomException(ErrorCode.ERR_12001)
         
-        # 获取用户列表
-        user_list = []
-        for user in role.users:
-            user_dict = {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "avatar": user.avatar,
-                "gender": user.gender,
-                "enable": user.enable,
-                "createTime": user.create_time.isoformat() if user.create_time else None
-            }
-            user_list.append(user_dict)
-        
-        return user_list 
\ No newline at end of file
+        return users 
\ No newline at end of file
@@ -0,0 +1,286 @@
+from app.models.user import User
+from app.models.role import Role
+from app.models.permission import Permission
+from app.core.cache import cache_bus
+from app.core.config import settings
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import heapq
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 可搜索的数据：名称 -> (模型, 建立索引的字段, 搜索结果返回的字段)
+SEARCH_ENTITIES = {
+    "user": (User, ("username",), ("id", "username", "enable")),
+    "role": (Role, ("code", "name"), ("id", "code", "name", "enable")),
+    "permission": (Permission, ("name", "code"), ("id", "name", "code", "type", "enable")),
+}
+
+# 重建索引时每批读取的行数
+LOAD_BATCH_SIZE = 10000
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """单个字段的三元组倒排索引
+
+    每个值按连续 3 个字符切分，记录 三元组 -> 包含它的ID集合。子串查询先对查询词的全部三元组求交集
+    得到候选，再逐个确认是否包含查询词。查询词不足 3 个字符时退化为顺序扫描。
+    值统一转为小写，与 MySQL 默认排序规则下 LIKE 不区分大小写一致。
+    """
+
+    def __init__(self):
+        self.values: Dict[int, str] = {}
+        self.grams: Dict[str, Set[int]] = {}
+
+    def add(self, doc_id: int, value: Optional[str]):
+        self.remove(doc_id)
+        value = (value or "").lower()
+        self.values[doc_id] = value
+        for gram in _trigrams(value):
+            ids = self.grams.get(gram)
+            if ids is None:
+                self.grams[gram] = {doc_id}
+            else:
+                ids.add(doc_id)
+
+    def remove(self, doc_id: int):
+        value = self.values.pop(doc_id, None)
+        if value is None:
+            return
+        for gram in _trigrams(value):
+            ids = self.grams.get(gram)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self.grams[gram]
+
+    def search(self, text: str) -> Iterable[int]:
+        """查找值包含 text 的全部ID"""
+        text = text.lower()
+        grams = _trigrams(text)
+        if not grams:
+            return [doc_id for doc_id, value in self.values.items() if text in value]
+
+        postings = []
+        for gram in grams:
+            ids = self.grams.get(gram)
+            if not ids:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = postings[0].intersection(*postings[1:])
+        if len(grams) == 1:
+            # 查询词本身就是一个三元组，候选即结果
+            return candidates
+        return [doc_id for doc_id in candidates if text in self.values[doc_id]]
+
+
+class SearchIndex:
+    """用户、角色、权限的进程内搜索索引
+
+    启动时从数据库加载，各服务写入后通过 cache_bus 广播变更文档，写入的进程立即更新本地索引，
+    其他进程收到广播后更新；定期全量重建以修正广播丢失造成的偏差。索引未就绪时查询回退到数据库 LIKE。
+
+    索引只保证最终一致：其他进程的写入在广播到达前不可见，广播丢失或绕过服务直接修改数据库时，
+    最长要到下次全量重建（SEARCH_INDEX_REBUILD_INTERVAL）才能修正。因此只用于 /search 联想搜索，
+    用户、角色、权限列表的过滤条件仍以数据库 LIKE 为准。
+    """
+
+    def __init__(self):
+        self.indexes: Dict[str, Dict[str, TrigramIndex]] = {}
+        self.docs: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self.ready = False
+        self.rebuilds = 0
+        self.task: Optional[asyncio.Task] = None
+        # 重建期间收到的变更，新索引替换旧索引后重放
+        self._pending: Optional[List[Dict[str, Any]]] = None
+
+    def _apply(self, message: Dict[str, Any]):
+        entity, doc_id, doc = message["entity"], int(message["id"]), message.get("doc")
+        if self._pending is not None:
+            self._pending.append(message)
+        if entity not in self.indexes:
+            return
+
+        fields = SEARCH_ENTITIES[entity][1]
+        if doc is None:
+            self.docs[entity].pop(doc_id, None)
+            for field in fields:
+                self.indexes[entity][field].remove(doc_id)
+        else:
+            self.docs[entity][doc_id] = doc
+            for field in fields:
+                self.indexes[entity][field].add(doc_id, doc.get(field))
+
+    async def upsert(self, entity: str, obj):
+        """新增或修改后同步索引（需在写入完成后调用）"""
+        doc = {field: getattr(obj, field) for field in SEARCH_ENTITIES[entity][2]}
+        await cache_bus.publish("search", {"entity": entity, "id": obj.id, "doc": doc})
+
+    async def remove(self, entity: str, doc_id: int):
+        """删除后同步索引"""
+        await cache_bus.publish("search", {"entity": entity, "id": doc_id, "doc": None})
+
+    async def rebuild(self):
+        """从数据库全量重建索引"""
+        self._pending = []
+        try:
+            indexes, docs = {}, {}
+            for entity, (model, fields, doc_fields) in SEARCH_ENTITIES.items():
+                indexes[entity] = {field: TrigramIndex() for field in fields}
+                docs[entity] = {}
+                last_id = 0
+                while True:
+                    rows = await model.filter(id__gt=last_id).order_by("id").limit(LOAD_BATCH_SIZE).values(*doc_fields)
+                    for row in rows:
+                        docs[entity][row["id"]] = row
+                        for field in fields:
+                            indexes[entity][field].add(row["id"], row[field])
+                    if len(rows) < LOAD_BATCH_SIZE:
+                        break
+                    last_id = rows[-1]["id"]
+                    # 让出事件循环，避免大表加载期间阻塞请求
+                    await asyncio.sleep(0)
+
+            pending = self._pending
+            self.indexes, self.docs = indexes, docs
+        finally:
+            self._pending = None
+
+        for message in pending:
+            self._apply(message)
+        self.ready = True
+        self.rebuilds += 1
+
+    def search(self, entity: str, text: str, limit: int) -> List[Dict[str, Any]]:
+        """在实体的全部索引字段中搜索，完全匹配优先，其次前缀匹配，同级按 id 升序
+
+        先取全部匹配再排序截取，不能在匹配阶段按数量提前截断，否则会漏掉排在后面的完全匹配或前缀匹配
+        """
+        text = text.lower()
+        ranks: Dict[int, int] = {}
+        for field, index in self.indexes[entity].items():
+            for doc_id in index.search(text):
+                value = index.values[doc_id]
+                rank = 0 if value == text else 1 if value.startswith(text) else 2
+                if rank < ranks.get(doc_id, 3):
+                    ranks[doc_id] = rank
+
+        docs = self.docs[entity]
+        best = heapq.nsmallest(limit, ranks.items(), key=lambda item: (item[1], item[0]))
+        return [docs[doc_id] for doc_id, _ in best]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "rebuilds": self.rebuilds,
+            "documents": {entity: len(docs) for entity, docs in self.docs.items()},
+            "trigrams": {
+                entity: sum(len(index.grams) for index in indexes.values())
+                for entity, indexes in self.indexes.items()
+            },
+        }
+
+    async def _rebuild_loop(self):
+        while True:
+            try:
+                await self.rebuild()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"重建搜索索引失败: {e}")
+            await asyncio.sleep(settings.SEARCH_INDEX_REBUILD_INTERVAL)
+
+    def start(self):
+        """后台加载索引并定期重建"""
+        if settings.SEARCH_INDEX_ENABLED and self.task is None:
+            self.task = asyncio.create_task(self._rebuild_loop())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+
+# 创建搜索索引实例
+search_index = SearchIndex()
+
+# 任一进程写入后，同步本进程的搜索索引
+cache_bus.register("search", search_index._apply)
+
+
+class FulltextFilter:
+    """列表过滤的 MySQL FULLTEXT（ngram 分词）索引
+
+    username、name、code 等包含过滤会生成前置通配符的 LIKE，无法使用普通索引。对建有 ngram 全文索引的列，
+    在 LIKE 之外追加短语全文匹配 MATCH(列) AGAINST('"查询词"')：数据库先用全文索引找出包含查询词全部
+    相邻 n-gram 的候选行，再用 LIKE 逐行确认，结果与单独使用 LIKE 完全一致。全文索引随事务一起提交，
+    没有进程内索引的最终一致问题。
+
+    启动时从 information_schema 读取已建有单列 FULLTEXT 索引的列（见 init.sql），其余列、非 MySQL 数据库、
+    短于 ngram_token_size 或包含非字母数字字符（分词规则不同）的查询词仍只使用 LIKE。
+    """
+
+    def __init__(self):
+        # (表名, 列名)
+        self.columns: Set[Tuple[str, str]] = set()
+        self.token_size = 2
+
+    async def load(self, db):
+        """读取全文索引列，数据库不是 MySQL 时不启用"""
+        if db.capabilities.dialect != "mysql":
+            return
+        try:
+            rows = await db.execute_query_dict(
+                "SELECT TABLE_NAME, INDEX_NAME, MAX(COLUMN_NAME) AS COLUMN_NAME FROM information_schema.STATISTICS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND INDEX_TYPE = 'FULLTEXT' "
+                "GROUP BY TABLE_NAME, INDEX_NAME HAVING COUNT(*) = 1"
+            )
+            self.columns = {(row["TABLE_NAME"], row["COLUMN_NAME"]) for row in rows}
+            rows = await db.execute_query_dict("SELECT @@ngram_token_size AS size")
+            self.token_size = int(rows[0]["size"])
+        except Exception as e:
+            logger.warning(f"读取全文索引失败，列表过滤使用 LIKE: {e}")
+            self.columns = set()
+        if self.columns:
+            logger.info(f"列表过滤使用全文索引: {sorted(self.columns)}")
+
+    def contains(self, query: QuerySet, field: str, text: str) -> QuerySet:
+        """为查询添加 field 包含 text 的过滤条件"""
+        query = query.filter(**{f"{field}__contains": text})
+        meta = query.model._meta
+        column = meta.fields_map[field].source_field or field
+        if (meta.db_table, column) in self.columns and len(text) >= self.token_size and text.isalnum():
+            query = query.filter(**{f"{field}__search": f'"{text}"'})
+        return query
+
+
+# 创建全文索引过滤实例
+fulltext_filter = FulltextFilter()
+
+
+class SearchService:
+    @staticmethod
+    async def search(text: str, limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
+        """搜索用户、角色和权限"""
+        result = {}
+        for entity, (model, fields, doc_fields) in SEARCH_ENTITIES.items():
+            if search_index.ready:
+                result[entity] = search_index.search(entity, text, limit)
+                continue
+
+            # 索引未就绪时使用数据库查询
+            condition = Q(*(Q(**{f"{field}__contains": text}) for field in fields), join_type="OR")
+            result[entity] = await model.filter(condition).order_by("id").limit(limit).values(*doc_fields)
+        return result
@@ -0,0 +1,125 @@
+from app.core.redis import redis_client
+from app.core.config import settings
+from typing import Optional, Tuple
+import hashlib
+import logging
+import secrets
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# 刷新令牌轮换脚本：令牌存在时递增使用次数并返回 [使用次数, 用户ID, 会话ID]
+# 使用次数大于 1 说明已轮换过的旧令牌被再次使用
+ROTATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local used = redis.call('HINCRBY', KEYS[1], 'used', 1)
+local record = redis.call('HMGET', KEYS[1], 'uid', 'sid')
+return {used, record[1], record[2]}
+"""
+
+
+class SessionService:
+    """刷新令牌会话
+
+    - refresh:token:{令牌摘要}  哈希表，记录用户ID、会话ID和使用次数，已轮换的旧令牌保留到过期用于重用检测；
+    - refresh:session:{会话ID}  会话当前有效的刷新令牌摘要；
+    - refresh:user:{用户ID}     用户的会话集合，用于修改密码等场景下注销全部会话。
+    """
+
+    _rotate_script = None
+
+    @staticmethod
+    def _digest(refresh_token: str) -> str:
+        return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+    @staticmethod
+    def _token_key(digest: str) -> str:
+        return f"refresh:token:{digest}"
+
+    @staticmethod
+    def _session_key(session_id: str) -> str:
+        return f"refresh:session:{session_id}"
+
+    @staticmethod
+    def _user_key(user_id) -> str:
+        return f"refresh:user:{user_id}"
+
+    @staticmethod
+    async def _issue(user_id: int, session_id: str) -> str:
+        """为会话签发新的刷新令牌"""
+        refresh_token = secrets.token_urlsafe(32)
+        digest = SessionService._digest(refresh_token)
+        ttl = settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+        pipe = redis_client.client.pipeline(transaction=True)
+        pipe.hset(SessionService._token_key(digest), mapping={"uid": user_id, "sid": session_id, "used": 0})
+        pipe.expire(SessionService._token_key(digest), ttl)
+        pipe.set(SessionService._session_key(session_id), digest, ex=ttl)
+        pipe.sadd(SessionService._user_key(user_id), session_id)
+        pipe.expire(SessionService._user_key(user_id), ttl)
+        await pipe.execute()
+
+        return refresh_token
+
+    @staticmethod
+    async def create_session(user_id: int) -> Tuple[str, str]:
+        """创建会话，返回 (会话ID, 刷新令牌)"""
+        session_id = uuid.uuid4().hex
+        refresh_token = await SessionService._issue(user_id, session_id)
+        return session_id, refresh_token
+
+    @staticmethod
+    async def is_active(session_id: Optional[str]) -> bool:
+        """会话是否有效（未注销、未过期，也未因刷新令牌重用被注销）"""
+        if not session_id:
+            return False
+        return bool(await redis_client.exists(SessionService._session_key(session_id)))
+
+    @staticmethod
+    async def rotate(refresh_token: str) -> Optional[Tuple[int, str, str]]:
+        """轮换刷新令牌，返回 (用户ID, 会话ID, 新刷新令牌)，令牌无效或被重用时返回 None"""
+        if SessionService._rotate_script is None:
+            SessionService._rotate_script = redis_client.client.register_script(ROTATE_SCRIPT)
+
+        digest = SessionService._digest(refresh_token)
+        result = await SessionService._rotate_script(keys=[SessionService._token_key(digest)])
+        if not result:
+            return None
+
+        used, user_id, session_id = result
+        user_id = int(user_id)
+        session_id = session_id.decode() if isinstance(session_id, bytes) else session_id
+
+        if int(used) > 1:
+            # 旧令牌被重用，可能已泄露，注销整个会话
+            logger.warning(f"检测到刷新令牌重用，注销会话: user_id={user_id}, session_id={session_id}")
+            await SessionService.revoke_session(user_id, session_id)
+            return None
+
+        new_token = await SessionService._issue(user_id, session_id)
+        return user_id, session_id, new_token
+
+    @staticmethod
+    async def revoke_session(user_id, session_id: str):
+        """注销会话"""
+        session_key = SessionService._session_key(session_id)
+        digest = await redis_client.get(session_key)
+
+        pipe = redis_client.client.pipeline(transaction=True)
+        if digest:
+            digest = digest.decode() if isinstance(digest, bytes) else digest
+            pipe.delete(SessionService._token_key(digest))
+        pipe.delete(session_key)
+        pipe.srem(SessionService._user_key(user_id), session_id)
+        await pipe.execute()
+
+    @staticmethod
+    async def revoke_user_sessions(user_id: int):
+        """注销用户的全部会话"""
+        session_ids = await redis_client.client.smembers(SessionService._user_key(user_id))
+        for session_id in session_ids:
+            session_id = session_id.decode() if isinstance(session_id, bytes) else session_id
+            await SessionService.revoke_session(user_id, session_id)
+        await redis_client.delete(SessionService._user_key(user_id))
@@ -0,0 +1,153 @@
+from app.models.user import User
+from app.models.role import Role
+from app.models.permission import Permission
+from app.core.redis import redis_client
+from app.core.config import settings
+from tortoise.functions import Count
+from typing import Dict, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 计数器增量脚本：计数器不存在时不写入，避免只有部分字段的计数器被当作完整数据读取
+INCR_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+for i = 1, #ARGV, 2 do
+    redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
+
+# 全部计数器字段
+COUNTER_FIELDS = (
+    "permission:total", "permission:menu", "permission:button", "permission:enabled", "permission:disabled",
+    "role:total", "role:active", "user:total",
+)
+
+
+def permission_deltas(permission, sign: int = 1) -> Dict[str, int]:
+    """新增（sign=1）或删除（sign=-1）一个权限对应的计数器增量"""
+    deltas = {"permission:total": sign}
+    if permission.type == "MENU":
+        deltas["permission:menu"] = sign
+    elif permission.type == "BUTTON":
+        deltas["permission:button"] = sign
+    deltas["permission:enabled" if permission.enable else "permission:disabled"] = sign
+    return deltas
+
+
+def role_deltas(role, sign: int = 1) -> Dict[str, int]:
+    """新增（sign=1）或删除（sign=-1）一个角色对应的计数器增量"""
+    deltas = {"role:total": sign}
+    if role.enable:
+        deltas["role:active"] = sign
+    return deltas
+
+
+class StatsCounters:
+    """统计计数器
+
+    计数保存在 Redis 哈希表中，各服务在增删改时按增量更新，统计接口直接读取；
+    计数器不存在时使用 GROUP BY / COUNT 聚合查询重建，后台任务定期对账修正偏差。
+    """
+
+    KEY = "stats:counters"
+
+    def __init__(self):
+        self.script = None
+        self.task: Optional[asyncio.Task] = None
+        self.reconciled = 0
+
+    @staticmethod
+    async def compute() -> Dict[str, int]:
+        """使用聚合查询计算全部计数"""
+        counters = {field: 0 for field in COUNTER_FIELDS}
+
+        rows = await Permission.annotate(count=Count("id")).group_by("type", "enable").values("type", "enable", "count")
+        for row in rows:
+            counters["permission:total"] += row["count"]
+            if row["type"] == "MENU":
+                counters["permission:menu"] += row["count"]
+            elif row["type"] == "BUTTON":
+                counters["permission:button"] += row["count"]
+            counters["permission:enabled" if row["enable"] else "permission:disabled"] += row["count"]
+
+        rows = await Role.annotate(count=Count("id")).group_by("enable").values("enable", "count")
+        for row in rows:
+            counters["role:total"] += row["count"]
+            if row["enable"]:
+                counters["role:active"] += row["count"]
+
+        counters["user:total"] = await User.all().count()
+        return counters
+
+    async def reconcile(self) -> Dict[str, int]:
+        """重新计算并覆盖 Redis 中的计数器"""
+        counters = await self.compute()
+        await redis_client.client.hset(self.KEY, mapping=counters)
+        self.reconciled += 1
+        return counters
+
+    async def incr(self, deltas: Dict[str, int]):
+        """按增量更新计数器（需在写入完成后调用），失败时等待对账修正"""
+        args = []
+        for field, delta in deltas.items():
+            if delta:
+                args.extend([field, delta])
+        if not args:
+            return
+
+        try:
+            if self.script is None:
+                self.script = redis_client.client.register_script(INCR_SCRIPT)
+            await self.script(keys=[self.KEY], args=args)
+        except Exception as e:
+            logger.warning(f"更新统计计数器失败: {e}")
+
+    async def get(self) -> Dict[str, int]:
+        """读取全部计数器，计数器不存在时重建"""
+        try:
+            values = await redis_client.client.hgetall(self.KEY)
+            if values:
+                counters = {field: 0 for field in COUNTER_FIELDS}
+                for field, value in values.items():
+                    field = field.decode() if isinstance(field, bytes) else field
+                    counters[field] = int(value)
+                return counters
+            return await self.reconcile()
+        except Exception as e:
+            # Redis 不可用时直接使用聚合查询
+            logger.warning(f"读取统计计数器失败: {e}")
+            return await self.compute()
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(settings.STATS_RECONCILE_INTERVAL)
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"统计计数器对账失败: {e}")
+
+    def start(self):
+        """启动定期对账"""
+        if self.task is None:
+            self.task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        """停止定期对账"""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+
+# 创建统计计数器实例
+stats_counters = StatsCounters()
@@ -1,15 +1,49 @@
-from app.models.user import User, Profile
+from app.models.user import User, Profile, DEFAULT_AVATAR
 from app.models.role import Role
 from app.schemas.user import UserCreate, UserUpdate, ProfileUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.hasher import password_hasher
+from app.core.revocation import revocation_store
+from app.services.principal import PrincipalService
+from app.services.authz import AuthzService
+from app.services.session import SessionService
+from app.services.stats import stats_counters
+from app.services.list_count import list_counter
+from app.services.search import search_index, fulltext_filter
 from app.utils.exceptions import CustomException, ErrorCode
-from typing import List, Optional, Dict, Any
+from app.utils.pagination import keyset_query, keyset_page
+from app.utils.projection import Projection, isoformat_z
+from app.utils.sql import parameterized_sql
+from typing import List, Optional, Dict, Any, Sequence
 from tortoise.expressions import Q
-from tortoise.transactions import atomic
+from tortoise.transactions import in_transaction
+from tortoise.queryset import QuerySet
+import json
+
+# 用户列表游标分页的排序键
+USER_CURSOR_KEYS = ("create_time", "id")
+
+# 查询结果投影，只选取响应需要的列
+USER_ITEM = Projection(
+    "id", "username", "enable", createTime="create_time", updateTime="update_time",
+    converters={"createTime": isoformat_z, "updateTime": isoformat_z},
+)
+USER_BRIEF_ITEM = Projection("id", "username", "enable")
+# 从用户一侧沿关联查询的投影
+USER_ROLE_ITEM = Projection("id", "code", "name", "enable").related("roles")
+USER_PERMISSION_ITEM = Projection("id", "name", "code", "type").related("roles__permissions")
+PROFILE_ITEM = Projection(
+    "id", userId="user_id", gender="gender", avatar="avatar", email="email", phone="phone", nickName="nick_name"
+)
+
+# 按数据库方言将用户的角色聚合为 JSON 数组（子查询中 r 为角色表别名）
+USER_ROLES_AGGREGATE = {
+    "mysql": "JSON_ARRAYAGG(JSON_OBJECT('id', r.{q}id{q}, 'code', r.{q}code{q}, 'name', r.{q}name{q}, 'enable', r.{q}enable{q}))",
+    "sqlite": "json_group_array(json_object('id', r.{q}id{q}, 'code', r.{q}code{q}, 'name', r.{q}name{q}, 'enable', r.{q}enable{q}))",
+    "postgres": "json_agg(json_build_object('id', r.{q}id{q}, 'code', r.{q}code{q}, 'name', r.{q}name{q}, 'enable', r.{q}enable{q}))",
+}
 
 class UserService:
     @staticmethod
-    @atomic()
     async def create_user(user_data: UserCreate) -> User:
         """创建用户"""
         # 检查用户名是否已存在
@@ -17,22 +51,29 @@ class UserService:
         if exists:
             raise CustomException(ErrorCode.ERR_11002)
         
-        # 创建用户
-        hashed_password = get_password_hash(user_data.password)
-        user = await User.create(
-            username=user_data.username,
-            password=hashed_password,
-            enable=user_data.enable
-        )
-        
-        # 创建用户资料
-        await Profile.create(user_id=user.id)
-        
-        # 如果提供了角色ID，则添加角色
-        if user_data.roleIds:
-            roles = await Role.filter(id__in=user_data.roleIds).all()
-            await user.roles.add(*roles)
+        # 哈希计算较慢，放在事务外进行，避免长时间占用数据库连接
+        hashed_password = await password_hasher.hash(user_data.password)
         
+        async with in_transaction():
+            # 创建用户
+            user = await User.create(
+                username=user_data.username,
+                password=hashed_password,
+                enable=user_data.enable
+            )
+            
+            # 创建用户资料
+            await Profile.create(user_id=user.id)
+            
+            # 如果提供了角色ID，则添加角色
+            if user_data.roleIds:
+                roles = await Role.filter(id__in=user_data.roleIds).all()
+                await user.roles.add(*roles)
+        
+        # 事务提交后再更新统计、列表总数缓存和搜索索引
+        await stats_counters.incr({"user:total": 1})
+        await list_counter.invalidate("user")
+        await search_index.upsert("user", user)
         return user
     
     @staticmethod
@@ -60,6 +101,9 @@ class UserService:
         update_data = user_data.dict(exclude_unset=True)
         if update_data:
             await user.update_from_dict(update_data).save()
+            await PrincipalService.invalidate(user_id)
+            await list_counter.invalidate("user")
+            await search_index.upsert("user", user)
         
         return user
     
@@ -71,6 +115,11 @@ class UserService:
             raise CustomException(ErrorCode.ERR_11001)
         
         await user.delete()
+        await stats_counters.incr({"user:total": -1})
+        await list_counter.invalidate("user")
+        await search_index.remove("user", user_id)
+        await PrincipalService.invalidate(user_id)
+        await SessionService.revoke_user_sessions(user_id)
         return True
     
     @staticmethod
@@ -95,6 +144,9 @@ class UserService:
             if update_data:
                 await profile.update_from_dict(update_data).save()
         
+        # 用户详情包含资料，递增用户版本号使 ETag 失效
+        await PrincipalService.invalidate(user_id)
+        
         # 将 Profile 对象转换为字典
         return {
             "id": profile.id,
@@ -135,42 +187,38 @@ class UserService:
     @staticmethod
     async def get_user_permissions(user_id: int) -> List[Dict[str, Any]]:
         """获取用户权限"""
-        user = await User.filter(id=user_id).prefetch_related("roles__permissions").first()
-        if not user:
+        permissions = await UserService._get_user_permissions(user_id)
+        if permissions is None:
             raise CustomException(ErrorCode.ERR_11001)
         
-        permissions = []
-        permission_ids = set()
-        
-        for role in user.roles:
-            for permission in role.permissions:
-                if permission.id not in permission_ids:
-                    permission_ids.add(permission.id)
-                    permissions.append({
-                        "id": permission.id,
-                        "name": permission.name,
-                        "code": permission.code,
-                        "type": permission.type
-                    })
-        
         return permissions
     
     @staticmethod
-    @atomic()
+    async def _get_user_permissions(user_id: int) -> Optional[List[Dict[str, Any]]]:
+        """一次连接查询用户全部角色的权限（去重），用户不存在时返回 None"""
+        return await USER_PERMISSION_ITEM.all(
+            User.filter(id=user_id).distinct().order_by("roles__permissions__id")
+        )
+    
+    @staticmethod
     async def add_user_roles(user_id: int, role_ids: List[int]) -> User:
         """添加用户角色"""
-        user = await User.filter(id=user_id).prefetch_related("roles").first()
-        if not user:
-            raise CustomException(ErrorCode.ERR_11001)
-        
-        # 清除现有角色关联
-        await user.roles.clear()
-        
-        # 如果有新角色，则添加
-        if role_ids and len(role_ids) > 0:
-            roles = await Role.filter(id__in=role_ids).all()
-            await user.roles.add(*roles)
-        
+        async with in_transaction():
+            user = await User.filter(id=user_id).prefetch_related("roles").first()
+            if not user:
+                raise CustomException(ErrorCode.ERR_11001)
+            
+            # 清除现有角色关联
+            await user.roles.clear()
+            
+            # 如果有新角色，则添加
+            if role_ids and len(role_ids) > 0:
+                roles = await Role.filter(id__in=role_ids).all()
+                await user.roles.add(*roles)
+        
+        # 事务提交后再使缓存失效
+        await PrincipalService.invalidate(user_id)
+        await AuthzService.bump()
         return user
     
     @staticmethod
@@ -180,9 +228,14 @@ class UserService:
         if not user:
             raise CustomException(ErrorCode.ERR_11001)
         
-        hashed_password = get_password_hash(new_password)
+        hashed_password = await password_hasher.hash(new_password)
         user.password = hashed_password
         await user.save()
+        await PrincipalService.invalidate(user_id)
+        
+        # 密码变更后，之前签发的令牌和刷新令牌会话全部失效
+        await SessionService.revoke_user_sessions(user_id)
+        await revocation_store.revoke_user(user_id)
         
         return True
     
@@ -191,150 +244,178 @@ class UserService:
         page: int = 1, 
         page_size: int = 10, 
         username: Optional[str] = None,
-        enable: Optional[bool] = None
+        enable: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact"
     ) -> Dict[str, Any]:
-        """获取用户列表"""
+        """获取用户列表
+
+        cursor 不为 None 时使用游标分页（按 createTime、id 排序），空字符串表示第一页
+        total_mode: 总数计算方式，exact 精确计数（带缓存），estimate 估算，none 不计算
+        """
         query = User.all()
         
         if username:
-            query = query.filter(username__contains=username)
+            query = fulltext_filter.contains(query, "username", username)
         
         if enable is not None:
             query = query.filter(enable=enable)
         
-        total = await query.count()
-        users = await query.offset((page - 1) * page_size).limit(page_size).all()
-        
-        # 将 User 对象转换为字典
-        user_list = []
-        for user in users:
-            user_list.append({
-                "id": user.id,
-                "username": user.username,
-                "enable": user.enable,
-                "createTime": user.create_time.isoformat() + "Z" if user.create_time else None,
-                "updateTime": user.update_time.isoformat() + "Z" if user.update_time else None
-            })
+        if cursor is not None:
+            # 游标需要转换前的 createTime
+            rows = await USER_ITEM.fetch(keyset_query(query, page_size, cursor, USER_CURSOR_KEYS))
+            rows, next_cursor = keyset_page(rows, page_size, ("createTime", "id"))
+            user_list = USER_ITEM.convert(rows)
+        else:
+            total = await list_counter.total(query, {"username": username, "enable": enable}, total_mode)
+            user_list = await USER_ITEM.all(query.offset((page - 1) * page_size).limit(page_size))
+        
+        if cursor is not None:
+            return {
+                "items": user_list,
+                "nextCursor": next_cursor,
+                "hasMore": next_cursor is not None,
+                "page_size": page_size
+            }
         
         return {
             "items": user_list,
             "total": total,
+            "totalMode": total_mode,
             "page": page,
             "page_size": page_size
         }
         
+    @staticmethod
+    async def _fetch_user_details(page_query: QuerySet, order_keys: Sequence[str]) -> List[Dict[str, Any]]:
+        """用一条 SQL 读取一页用户的详细信息
+
+        page_query 只负责选出当前页的用户ID（过滤、排序、分页），作为派生表连接用户表和资料表，
+        角色通过相关子查询聚合为 JSON 数组，不再分别查询资料、角色并创建模型实例。
+        """
+        db = User._meta.db
+        dialect = db.capabilities.dialect
+        q = "`" if dialect == "mysql" else '"'
+        aggregate = USER_ROLES_AGGREGATE[dialect].format(q=q)
+        order_columns = {"id": "id", "create_time": "createTime"}
+        
+        page_sql, params = parameterized_sql(page_query.values("id"))
+        sql = (
+            f"SELECT u.{q}id{q}, u.{q}username{q}, u.{q}enable{q}, "
+            f"u.{q}createTime{q} AS {q}create_time{q}, u.{q}updateTime{q} AS {q}update_time{q}, "
+            f"p.{q}id{q} AS {q}profile_id{q}, p.{q}gender{q}, p.{q}avatar{q}, p.{q}email{q}, "
+            f"(SELECT {aggregate} FROM {q}user_roles_role{q} ur JOIN {q}role{q} r ON r.{q}id{q} = ur.{q}roleId{q} "
+            f"WHERE ur.{q}userId{q} = u.{q}id{q}) AS {q}roles{q} "
+            f"FROM ({page_sql}) page "
+            f"JOIN {q}user{q} u ON u.{q}id{q} = page.{q}id{q} "
+            f"LEFT JOIN {q}profile{q} p ON p.{q}userId{q} = u.{q}id{q} "
+            f"ORDER BY " + ", ".join(f"u.{q}{order_columns[key]}{q}" for key in order_keys)
+        )
+        rows = await db.execute_query_dict(sql, params)
+        
+        to_datetime = User._meta.fields_map["create_time"].to_python_value
+        for row in rows:
+            row["create_time"] = to_datetime(row["create_time"])
+            row["update_time"] = to_datetime(row["update_time"])
+            roles = row["roles"]
+            if isinstance(roles, (str, bytes)):
+                roles = json.loads(roles)
+            # JSON_ARRAYAGG / json_group_array 不保证元素顺序，解码后按角色 ID 排序
+            row["roles"] = sorted(
+                (
+                    {"id": role["id"], "code": role["code"], "name": role["name"], "enable": bool(role["enable"])}
+                    for role in roles or ()
+                ),
+                key=lambda role: role["id"],
+            )
+            # 没有资料记录时使用默认头像
+            if row["profile_id"] is None:
+                row["avatar"] = DEFAULT_AVATAR
+        return rows
+    
     @staticmethod
     async def get_users_with_details(
         page: int = 1, 
         page_size: int = 10, 
         username: Optional[str] = None,
-        enable: Optional[bool] = None
+        enable: Optional[bool] = None,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact"
     ) -> Dict[str, Any]:
-        """获取用户列表（包含详细信息）"""
+        """获取用户列表（包含详细信息）
+
+        cursor 不为 None 时使用游标分页（按 createTime、id 排序），空字符串表示第一页
+        total_mode: 总数计算方式，exact 精确计数（带缓存），estimate 估算，none 不计算
+        """
         query = User.all()
         
         if username:
-            query = query.filter(username__contains=username)
+            query = fulltext_filter.contains(query, "username", username)
         
         if enable is not None:
             query = query.filter(enable=enable)
         
-        total = await query.count()
-        users = await query.prefetch_related("profile", "roles").offset((page - 1) * page_size).limit(page_size).all()
-        
-        # 将 User 对象转换为字典，并包含详细信息
-        user_list = []
-        for user in users:
-            # 获取角色信息
-            roles = []
-            for role in user.roles:
-                roles.append({
-                    "id": role.id,
-                    "code": role.code,
-                    "name": role.name,
-                    "enable": role.enable
-                })
-            
-            # 获取用户资料
-            gender = None
-            avatar = "https://wpimg.wallstcn.com/f778738c-e4f8-4870-b634-56703b4acafe.gif?imageView2/1/w/80/h/80"
-            email = None
-            
-            if hasattr(user, "profile") and user.profile:
-                gender = user.profile.gender
-                avatar = user.profile.avatar
-                email = user.profile.email
-            
-            # 构建用户信息
-            user_dict = {
-                "id": user.id,
-                "username": user.username,
-                "enable": user.enable,
-                "createTime": user.create_time.isoformat() + "Z" if user.create_time else None,
-                "updateTime": user.update_time.isoformat() + "Z" if user.update_time else None,
-                "roles": roles,
-                "gender": gender,
-                "avatar": avatar,
-                "email": email
+        if cursor is not None:
+            rows = await UserService._fetch_user_details(
+                keyset_query(query, page_size, cursor, USER_CURSOR_KEYS), USER_CURSOR_KEYS
+            )
+            rows, next_cursor = keyset_page(rows, page_size, USER_CURSOR_KEYS)
+        else:
+            total = await list_counter.total(query, {"username": username, "enable": enable}, total_mode)
+            rows = await UserService._fetch_user_details(
+                query.order_by("id").offset((page - 1) * page_size).limit(page_size), ("id",)
+            )
+        
+        user_list = [
+            {
+                "id": row["id"],
+                "username": row["username"],
+                "enable": bool(row["enable"]),
+                "createTime": row["create_time"].isoformat() + "Z" if row["create_time"] else None,
+                "updateTime": row["update_time"].isoformat() + "Z" if row["update_time"] else None,
+                "roles": row["roles"],
+                "gender": row["gender"],
+                "avatar": row["avatar"],
+                "email": row["email"]
+            }
+            for row in rows
+        ]
+        
+        if cursor is not None:
+            return {
+                "pageData": user_list,
+                "nextCursor": next_cursor,
+                "hasMore": next_cursor is not None
             }
-            
-            user_list.append(user_dict)
         
         return {
             "pageData": user_list,
-            "total": total
+            "total": total,
+            "totalMode": total_mode
         }
     
     @staticmethod
     async def get_user_detail(user_id: int) -> Dict[str, Any]:
         """获取用户详情"""
-        user = await User.filter(id=user_id).prefetch_related("profile", "roles").first()
+        user = await USER_BRIEF_ITEM.first(User.filter(id=user_id))
         if not user:
             raise CustomException(ErrorCode.ERR_11001)
         
-        # 提取角色名称列表，而不是对象
-        role_names = [role.name for role in user.roles]
-        role_objects = [{"id": role.id, "code": role.code, "name": role.name, "enable": role.enable} for role in user.roles]
-        permissions = await UserService.get_user_permissions(user_id)
-        
-        # 将 Profile 对象转换为字典
-        profile_dict = None
-        if user.profile:
-            profile_dict = {
-                "id": user.profile.id,
-                "userId": user.profile.user_id,
-                "gender": user.profile.gender,
-                "avatar": user.profile.avatar,
-                "email": user.profile.email,
-                "phone": user.profile.phone,
-                "nickName": user.profile.nick_name
-            }
+        roles = await USER_ROLE_ITEM.all(User.filter(id=user_id)) or []
+        role_names = [role["name"] for role in roles]
+        permissions = await UserService._get_user_permissions(user_id) or []
+        profile_dict = await PROFILE_ITEM.first(Profile.filter(user_id=user_id))
         
         # 获取当前角色（优先使用超级管理员角色）
-        current_role = None
-        for role in user.roles:
-            if role.code == "SUPER_ADMIN":
-                current_role = {
-                    "id": role.id,
-                    "code": role.code,
-                    "name": role.name,
-                    "enable": role.enable
-                }
-                break
-        
-        if not current_role and user.roles:
-            current_role = {
-                "id": user.roles[0].id,
-                "code": user.roles[0].code,
-                "name": user.roles[0].name,
-                "enable": user.roles[0].enable
-            }
+        current_role = next((role for role in roles if role["code"] == "SUPER_ADMIN"), None)
+        if not current_role and roles:
+            current_role = roles[0]
         
         return {
-            "id": user.id,
-            "username": user.username,
-            "enable": user.enable,
-            "roles": role_objects,  # 返回完整角色对象
+            "id": user["id"],
+            "username": user["username"],
+            "enable": user["enable"],
+            "roles": roles,  # 返回完整角色对象
             "roleNames": role_names,  # 返回角色名称列表，用于前端显示
             "permissions": permissions,
             "profile": profile_dict,
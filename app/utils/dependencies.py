@@ -1,9 +1,16 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
+from jose import JWTError
 from app.core.config import settings
+from app.core.security import decode_access_token
+from app.core.revocation import revocation_store
+from app.core.ratelimit import rate_limit
 from app.utils.exceptions import CustomException, ErrorCode
-from app.services.user import UserService
+from app.services.principal import PrincipalService
+from app.services.authz import AuthzService
+from app.services.permission_bits import PermissionBitsService
+from app.services.permission_cache import permission_cache
+from app.utils.etag import make_etag, check_not_modified
 from typing import List, Optional
 from app.core.config import settings
 
@@ -12,9 +19,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     """获取当前用户"""
     try:
-        payload = jwt.decode(
-            token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
-        )
+        payload = decode_access_token(token)
         user_id = int(payload.get("sub"))
         if user_id is None:
             raise CustomException(
@@ -27,7 +32,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             status_code=status.HTTP_401_UNAUTHORIZED
         )
     
-    user = await UserService.get_user_by_id(user_id)
+    # 已登出或已吊销的令牌
+    if await revocation_store.is_revoked(payload):
+        raise CustomException(
+            error_code=ErrorCode.ERR_10002,
+            status_code=status.HTTP_401_UNAUTHORIZED
+        )
+    
+    user = await PrincipalService.get_principal(user_id)
     if user is None:
         raise CustomException(
             error_code=ErrorCode.ERR_11001,
@@ -49,16 +61,15 @@ async def get_current_active_user(current_user = Depends(get_current_user)):
 def check_roles(required_roles: List[str]):
     """检查用户角色"""
     async def _check_roles(current_user = Depends(get_current_active_user)):
-        user_roles = await UserService.get_user_roles(current_user.id)
-        user_role_codes = [role.code for role in user_roles]
+        snapshot = await AuthzService.get_snapshot(current_user.id)
         
         # 超级管理员拥有所有权限
-        if "SUPER_ADMIN" in user_role_codes:
+        if snapshot.is_super_admin:
             return current_user
         
         # 检查是否有所需角色
         for role in required_roles:
-            if role in user_role_codes:
+            if role in snapshot.role_codes:
                 return current_user
         
         raise CustomException(
@@ -69,6 +80,57 @@ def check_roles(required_roles: List[str]):
     
     return _check_roles
 
+def require_permission(code: str):
+    """检查用户是否拥有指定权限编码"""
+    async def _require_permission(current_user = Depends(get_current_active_user)):
+        bits = await PermissionBitsService.get_bits(current_user.id)
+        if bits.has(code):
+            return current_user
+        
+        raise CustomException(
+            error_code=ErrorCode.ERR_10005,
+            detail="权限不足，需要权限: " + code,
+            status_code=status.HTTP_403_FORBIDDEN
+        )
+    
+    return _require_permission
+
+def require_any(*codes: str):
+    """检查用户是否拥有任一指定权限编码"""
+    async def _require_any(current_user = Depends(get_current_active_user)):
+        bits = await PermissionBitsService.get_bits(current_user.id)
+        if bits.has_any(codes):
+            return current_user
+        
+        raise CustomException(
+            error_code=ErrorCode.ERR_10005,
+            detail="权限不足，需要以下权限之一: " + ", ".join(codes),
+            status_code=status.HTTP_403_FORBIDDEN
+        )
+    
+    return _require_any
+
+def permission_etag(name: str):
+    """权限树 ETag：由权限版本号生成，匹配时直接返回 304"""
+    async def _permission_etag(request: Request, current_user = Depends(get_current_active_user)) -> str:
+        etag = make_etag(name, permission_cache.version)
+        check_not_modified(request, etag)
+        return etag
+    
+    return _permission_etag
+
+async def role_tree_etag(request: Request, current_user = Depends(get_current_active_user)) -> str:
+    """角色权限树 ETag：由授权版本号、权限版本号和用户ID生成"""
+    etag = make_etag("role-tree", current_user.id, AuthzService.version, permission_cache.version)
+    check_not_modified(request, etag)
+    return etag
+
+async def user_detail_etag(request: Request, current_user = Depends(get_current_active_user)) -> str:
+    """用户详情 ETag：由用户版本号、授权版本号和权限版本号生成"""
+    etag = make_etag("user", current_user.id, current_user.version, AuthzService.version, permission_cache.version)
+    check_not_modified(request, etag)
+    return etag
+
 def check_preview():
     """检查是否为预览环境"""
     if not settings.IS_PREVIEW:
@@ -77,4 +139,7 @@ def check_preview():
             detail="此功能仅在预览环境可用",
             status_code=status.HTTP_403_FORBIDDEN
         )
-    return True 
\ No newline at end of file
+    return True
+
+# 管理端写操作限流（按令牌）
+admin_write_limit = rate_limit("admin_write", token=settings.RATE_LIMIT_ADMIN_WRITE_TOKEN)
@@ -0,0 +1,24 @@
+from fastapi import HTTPException, Request, status
+from typing import Dict
+
+
+def make_etag(*parts) -> str:
+    """由数据版本号生成强 ETag"""
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    """ETag 响应头，要求客户端每次使用前重新验证"""
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def check_not_modified(request: Request, etag: str):
+    """请求头 If-None-Match 与 ETag 匹配时直接返回 304"""
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return
+
+    candidates = [item.strip() for item in if_none_match.split(",")]
+    # If-None-Match 使用弱比较，忽略 W/ 前缀
+    if "*" in candidates or etag in (item[2:] if item.startswith("W/") else item for item in candidates):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
@@ -9,6 +9,8 @@ class ErrorCode(str, Enum):
     ERR_10003 = "验证码错误"
     ERR_10004 = "密码错误"
     ERR_10005 = "权限不足"
+    ERR_10006 = "系统繁忙，请稍后重试"
+    ERR_10007 = "请求过于频繁，请稍后再试"
     
     # 用户相关错误
     ERR_11001 = "用户不存在"
@@ -25,10 +27,11 @@ class ErrorCode(str, Enum):
     # 权限相关错误
     ERR_13001 = "权限不存在"
     ERR_13002 = "权限已存在"
+    ERR_13003 = "上级权限不能是自身或其下级权限"
 
 
 class CustomException(HTTPException):
-    def __init__(self, error_code: ErrorCode, detail: str = None, status_code: int = status.HTTP_400_BAD_REQUEST):
+    def __init__(self, error_code: ErrorCode, detail: str = None, status_code: int = status.HTTP_400_BAD_REQUEST, headers: dict = None):
         # 让 error_code 适应 401 情况
         if error_code == ErrorCode.ERR_10002 or status_code == status.HTTP_401_UNAUTHORIZED:
             self.code = 401
@@ -38,5 +41,6 @@ class CustomException(HTTPException):
 
         super().__init__(
             status_code=status_code,
-            detail=detail or error_code.value
+            detail=detail or error_code.value,
+            headers=headers
         )
\ No newline at end of file
@@ -11,6 +11,7 @@ from starlette.types import ASGIApp
 import time
 from typing import Callable
 import json
+from app.utils.response import PRE_ENCODED_HEADER
 
 
 class RequestMiddleware(BaseHTTPMiddleware):
@@ -40,6 +41,22 @@ class RequestMiddleware(BaseHTTPMiddleware):
                 async for chunk in response.body_iterator:
                     body += chunk
 
+                if response.headers.get(PRE_ENCODED_HEADER):
+                    # 预编码响应直接拼接字段，避免重新解析和编码整个响应体
+                    json_content = body.rstrip()[:-1] + (
+                        ',"originUrl":' + json.dumps(request.state.originUrl, ensure_ascii=False)
+                        + ',"elapsed_ms":' + json.dumps(elapsed_ms) + "}"
+                    ).encode("utf-8")
+                    new_response = Response(
+                        content=json_content,
+                        status_code=response.status_code,
+                        media_type="application/json"
+                    )
+                    for name, value in response.headers.items():
+                        if name.lower() not in ("content-length", PRE_ENCODED_HEADER.lower()):
+                            new_response.headers[name] = value
+                    return new_response
+
                 response_data = json.loads(body.decode())
 
                 # 添加原始路径和耗时
@@ -0,0 +1,85 @@
+from tortoise import fields
+from tortoise.expressions import Q
+from tortoise.queryset import QuerySet
+from app.utils.exceptions import CustomException, ErrorCode
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import binascii
+import json
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """将排序键的值编码为不透明的游标字符串"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(query: QuerySet, cursor: str, keys: Sequence[str]) -> List[Any]:
+    """解析游标，游标格式不正确时抛出参数错误"""
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(data)
+        if not isinstance(payload, list) or len(payload) != len(keys):
+            raise ValueError(cursor)
+
+        values = []
+        fields_map = query.model._meta.fields_map
+        for key, value in zip(keys, payload):
+            field = fields_map[key]
+            if isinstance(field, fields.DatetimeField):
+                value = datetime.fromisoformat(value)
+            elif isinstance(field, fields.IntField) and not isinstance(value, int):
+                raise ValueError(value)
+            values.append(value)
+        return values
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise CustomException(ErrorCode.ERR_10001, "无效的分页游标")
+
+
+def _after(keys: Sequence[str], values: Sequence[Any]) -> Q:
+    """生成 (k1, k2, ...) > (v1, v2, ...) 的条件
+
+    展开为 k1 > v1 OR (k1 = v1 AND k2 > v2) OR ...，数据库可以直接利用排序键上的索引定位起点
+    """
+    condition = None
+    for position in range(len(keys)):
+        equals = {keys[i]: values[i] for i in range(position)}
+        branch = Q(**equals, **{f"{keys[position]}__gt": values[position]})
+        condition = branch if condition is None else condition | branch
+    return condition
+
+
+def keyset_query(
+    query: QuerySet,
+    page_size: int,
+    cursor: Optional[str] = None,
+    keys: Sequence[str] = ("id",),
+) -> QuerySet:
+    """生成游标分页（keyset pagination）的查询
+
+    按排序键升序取下一页，使用上一页最后一行的排序键定位起点，而不是 OFFSET 跳过前面的行，
+    任意深度的翻页代价相同。排序键最后一个字段必须唯一（通常为 id）。多取一行用于判断是否还有下一页，
+    查询结果交给 keyset_page 截取当前页并生成下一页游标。
+
+    cursor: 上一页返回的 nextCursor，为空时从第一页开始
+    """
+    if cursor:
+        query = query.filter(_after(keys, decode_cursor(query, cursor, keys)))
+    return query.order_by(*keys).limit(page_size + 1)
+
+
+def keyset_page(items: list, page_size: int, keys: Sequence[str] = ("id",)) -> Tuple[list, Optional[str]]:
+    """从 keyset_query 的结果中截取当前页并生成下一页游标，没有下一页时游标为 None"""
+    if len(items) <= page_size:
+        return items, None
+
+    items = items[:page_size]
+    last = items[-1]
+    if isinstance(last, dict):
+        values = [last[key] for key in keys]
+    else:
+        values = [getattr(last, key) for key in keys]
+    return items, encode_cursor(values)
+
@@ -0,0 +1,77 @@
+from tortoise.queryset import QuerySet
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+
+def isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def isoformat_z(value: Optional[datetime]) -> Optional[str]:
+    """与列表接口原有格式一致，在 isoformat 后追加 Z"""
+    return value.isoformat() + "Z" if value else None
+
+
+class Projection:
+    """字段投影
+
+    只查询需要的列（QuerySet.values），结果直接作为响应字典，不创建模型实例再逐个复制属性。
+
+    - 位置参数：字段名即输出键
+    - 关键字参数：输出键=字段名，字段名可以跨关联（如 email="profile__email"）
+    - converters：输出键 -> 转换函数，用于日期格式化等
+    输出字典的键顺序为位置参数在前、关键字参数在后。
+    """
+
+    def __init__(self, *fields: str, converters: Optional[Dict[str, Callable[[Any], Any]]] = None, **aliases: str):
+        self.fields = fields
+        self.aliases = aliases
+        self.converters = converters or {}
+
+    @property
+    def columns(self) -> Dict[str, str]:
+        """输出键 -> 字段名"""
+        return {**{field: field for field in self.fields}, **self.aliases}
+
+    def related(self, relation: str) -> "RelatedProjection":
+        """生成沿关联查询的投影，字段名加上关联前缀（如 permissions__id）"""
+        columns = {key: f"{relation}__{field}" for key, field in self.columns.items()}
+        return RelatedProjection(converters=self.converters, **columns)
+
+    async def fetch(self, query: QuerySet) -> List[Dict[str, Any]]:
+        """查询投影的列，不应用转换函数（用于转换前还需要原始值的场景，如生成分页游标）"""
+        return await query.values(*self.fields, **self.aliases)
+
+    def convert(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """对 fetch 的结果应用转换函数（原地修改）"""
+        if self.converters:
+            for row in rows:
+                for key, converter in self.converters.items():
+                    row[key] = converter(row[key])
+        return rows
+
+    async def all(self, query: QuerySet) -> List[Dict[str, Any]]:
+        """查询全部结果"""
+        return self.convert(await self.fetch(query))
+
+    async def first(self, query: QuerySet) -> Optional[Dict[str, Any]]:
+        """查询第一条结果，没有结果时返回 None"""
+        rows = await self.all(query.limit(1))
+        return rows[0] if rows else None
+
+
+class RelatedProjection(Projection):
+    """关联投影
+
+    以主表按主键过滤的查询为起点，经中间表连接关联表（如 Role.filter(id=1) 取 permissions__*），
+    数据库从主键和中间表索引开始连接，而不是从关联表一侧全表连接。同一条查询还能判断主表行是否存在：
+    主表行不存在时 all() 返回 None，存在但没有关联数据时返回空列表。
+    """
+
+    async def all(self, query: QuerySet) -> Optional[List[Dict[str, Any]]]:
+        rows = await self.fetch(query)
+        if not rows:
+            return None
+        # 没有关联数据时外连接产生一行全为 NULL 的结果
+        key = next(iter(self.aliases))
+        return self.convert([row for row in rows if row[key] is not None])
@@ -1,8 +1,12 @@
 from typing import Any, Dict, Optional, Union
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi import status
+import json
 import time
 
+# 预编码响应标记头，中间件据此直接在字节层面追加字段
+PRE_ENCODED_HEADER = "X-Pre-Encoded"
+
 
 class ResponseModel:
     """统一响应模型"""
@@ -57,6 +61,33 @@ class ResponseModel:
         return response
 
 
+    @staticmethod
+    def encode(content: Dict[str, Any]) -> bytes:
+        """编码为 JSON 字节（与默认响应类一致，不转义中文）"""
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+
+class EncodedJSONResponse(Response):
+    """预编码JSON响应，内容为 ResponseModel.encode 的结果，可跨请求复用"""
+
+    media_type = "application/json"
+
+    def __init__(
+            self,
+            content: bytes,
+            status_code: int = status.HTTP_200_OK,
+            headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        headers = dict(headers or {})
+        headers[PRE_ENCODED_HEADER] = "1"
+        super().__init__(content=content, status_code=status_code, headers=headers)
+
+
 class CustomJSONResponse(JSONResponse):
     """自定义JSON响应"""
 
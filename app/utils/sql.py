@@ -0,0 +1,20 @@
+from tortoise.queryset import QuerySet
+from typing import Any, List, Tuple
+
+
+def parameterized_sql(query: QuerySet) -> Tuple[str, List[Any]]:
+    """生成查询带占位符的 SQL 和参数，用于嵌入手写 SQL（派生表、EXPLAIN 等）
+
+    Tortoise 没有公开获取参数化 SQL 的接口，这里依赖其内部实现：QuerySet.sql() 构建 pypika 查询后
+    保存在 query.query 上，再由 get_parameterized_sql() 生成 SQL 和参数。所有调用集中在此处，
+    升级 Tortoise 后内部接口变化时直接抛出 RuntimeError，而不是拼出错误的 SQL。
+    """
+    try:
+        query.sql()
+        sql, params = query.query.get_parameterized_sql()
+    except (AttributeError, TypeError, ValueError) as e:
+        raise RuntimeError(f"无法生成参数化 SQL，Tortoise 内部接口可能已变化: {e}") from e
+
+    if not isinstance(sql, str) or not isinstance(params, (list, tuple)):
+        raise RuntimeError(f"无法生成参数化 SQL，Tortoise 内部接口返回了意外的结果: {type(sql)}, {type(params)}")
+    return sql, list(params)
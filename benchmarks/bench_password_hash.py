@@ -0,0 +1,91 @@
+"""
+密码哈希成本基准测试：统计各算法及成本参数下每个 CPU 核心每秒可完成的哈希次数，用于规划登录服务容量
+
+运行方式（项目根目录）:
+    python -m benchmarks.bench_password_hash
+    python -m benchmarks.bench_password_hash --bcrypt 10 12 14 --argon2 3:65536:4 --scrypt 16:8:1 --processes 4
+"""
+import argparse
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from app.core.config import settings
+from app.core.security import create_password_context
+
+
+def _run(scheme: str, params: Dict[str, Any], duration: float) -> int:
+    """在单个进程内持续计算哈希，返回完成次数"""
+    context = create_password_context(schemes=[scheme], **params)
+    # 预热一次，排除后端加载耗时
+    context.hash("benchmark-password")
+
+    count = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        context.hash("benchmark-password")
+        count += 1
+    return count
+
+
+def build_cases(args) -> List[Tuple[str, str, Dict[str, Any]]]:
+    """生成测试用例：(算法, 参数描述, 参数)"""
+    cases = []
+    for rounds in args.bcrypt:
+        cases.append(("bcrypt", f"rounds={rounds}", {"bcrypt_rounds": rounds}))
+
+    for item in args.argon2:
+        time_cost, memory_cost, parallelism = (int(value) for value in item.split(":"))
+        cases.append((
+            "argon2",
+            f"t={time_cost},m={memory_cost},p={parallelism}",
+            {"argon2_time_cost": time_cost, "argon2_memory_cost": memory_cost, "argon2_parallelism": parallelism},
+        ))
+
+    for item in args.scrypt:
+        rounds, block_size, parallelism = (int(value) for value in item.split(":"))
+        cases.append((
+            "scrypt",
+            f"N=2^{rounds},r={block_size},p={parallelism}",
+            {"scrypt_rounds": rounds, "scrypt_block_size": block_size, "scrypt_parallelism": parallelism},
+        ))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="密码哈希成本基准测试")
+    parser.add_argument("--duration", type=float, default=3, help="每个用例的测试时长（秒）")
+    parser.add_argument("--processes", type=int, default=1, help="并行进程数（按核心数折算）")
+    parser.add_argument("--bcrypt", type=int, nargs="*",
+                        default=sorted({settings.BCRYPT_ROUNDS - 2, settings.BCRYPT_ROUNDS, settings.BCRYPT_ROUNDS + 1}),
+                        help="bcrypt rounds 列表")
+    parser.add_argument("--argon2", nargs="*",
+                        default=[f"{settings.ARGON2_TIME_COST}:{settings.ARGON2_MEMORY_COST}:{settings.ARGON2_PARALLELISM}"],
+                        help="argon2 参数列表，格式 time_cost:memory_cost(KiB):parallelism")
+    parser.add_argument("--scrypt", nargs="*",
+                        default=[f"{settings.SCRYPT_ROUNDS}:{settings.SCRYPT_BLOCK_SIZE}:{settings.SCRYPT_PARALLELISM}"],
+                        help="scrypt 参数列表，格式 log2(N):block_size:parallelism")
+    args = parser.parse_args()
+
+    print(f"当前配置: PASSWORD_SCHEMES={settings.PASSWORD_SCHEMES}，进程数: {args.processes}，时长: {args.duration}s")
+    print(f"{'算法':<8}{'参数':<28}{'哈希/秒':>12}{'哈希/秒/核':>14}{'单次耗时(ms)':>16}")
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.processes, mp_context=context) as executor:
+        for scheme, label, params in build_cases(args):
+            futures = [executor.submit(_run, scheme, params, args.duration) for _ in range(args.processes)]
+            try:
+                total = sum(future.result() for future in futures)
+            except Exception as e:
+                print(f"{scheme:<8}{label:<28}  跳过: {e}")
+                continue
+
+            per_second = total / args.duration
+            per_core = per_second / args.processes
+            latency = 1000 / per_core if per_core else float("inf")
+            print(f"{scheme:<8}{label:<28}{per_second:>12.1f}{per_core:>14.1f}{latency:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
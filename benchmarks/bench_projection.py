@@ -0,0 +1,167 @@
+"""
+字段投影基准测试：对比各读取接口的原实现（创建模型实例后复制属性）与 Projection（.values 只查询需要的列）
+的耗时和内存分配峰值，使用内存 SQLite 数据库
+
+运行方式（项目根目录）:
+    python -m benchmarks.bench_projection
+    python -m benchmarks.bench_projection --users 5000 --permissions 2000 --repeat 5
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from tortoise import Tortoise
+
+from app.models.user import User, Profile
+from app.models.role import Role
+from app.models.permission import Permission
+from app.services.user import UserService
+from app.services.role import RoleService
+from app.services.permission import PermissionService
+
+PAGE_SIZE = 100
+
+
+async def seed(users: int, roles: int, permissions: int):
+    """生成用户、角色和权限：每个角色随机分配 10% 的权限，每个用户 1~3 个角色"""
+    rng = random.Random(users)
+    await Permission.bulk_create([
+        Permission(id=i, name=f"权限{i}", code=f"P{i}", type="MENU" if i % 3 else "BUTTON", path=f"/p/{i}")
+        for i in range(1, permissions + 1)
+    ], batch_size=5000)
+    await Role.bulk_create([Role(id=i, code=f"ROLE_{i}", name=f"角色{i}") for i in range(1, roles + 1)])
+    await User.bulk_create([
+        User(id=i, username=f"user{i:07d}", password="x") for i in range(1, users + 1)
+    ], batch_size=5000)
+    await Profile.bulk_create([
+        Profile(user_id=i, email=f"user{i}@example.com") for i in range(1, users + 1)
+    ], batch_size=5000)
+
+    db = Tortoise.get_connection("default")
+    role_links = [
+        (role_id, permission_id)
+        for role_id in range(1, roles + 1)
+        for permission_id in rng.sample(range(1, permissions + 1), permissions // 10)
+    ]
+    await db.execute_many('INSERT INTO "role_permissions_permission" ("roleId", "permissionId") VALUES (?, ?)', role_links)
+    user_links = [
+        (user_id, role_id)
+        for user_id in range(1, users + 1)
+        for role_id in rng.sample(range(1, roles + 1), rng.randint(1, 3))
+    ]
+    await db.execute_many('INSERT INTO "user_roles_role" ("userId", "roleId") VALUES (?, ?)', user_links)
+
+
+# ---------- 原实现 ----------
+
+async def legacy_get_users() -> List[Dict[str, Any]]:
+    users = await User.all().offset(0).limit(PAGE_SIZE).all()
+    return [
+        {
+            "id": user.id,
+            "username": user.username,
+            "enable": user.enable,
+            "createTime": user.create_time.isoformat() + "Z" if user.create_time else None,
+            "updateTime": user.update_time.isoformat() + "Z" if user.update_time else None,
+        }
+        for user in users
+    ]
+
+
+async def legacy_get_roles_with_permissions() -> List[Dict[str, Any]]:
+    roles = await Role.all().prefetch_related("permissions").offset(0).limit(PAGE_SIZE).all()
+    return [
+        {
+            "id": role.id,
+            "code": role.code,
+            "name": role.name,
+            "enable": role.enable,
+            "permissionIds": [p.id for p in role.permissions],
+        }
+        for role in roles
+    ]
+
+
+async def legacy_get_role_permissions() -> List[Dict[str, Any]]:
+    role = await Role.filter(id=1).prefetch_related("permissions").first()
+    return [
+        {"id": p.id, "code": p.code, "name": p.name, "type": p.type, "parent_id": p.parent_id}
+        for p in role.permissions
+    ]
+
+
+async def legacy_get_user_permissions() -> List[Dict[str, Any]]:
+    user = await User.filter(id=1).prefetch_related("roles__permissions").first()
+    permissions, seen = [], set()
+    for role in user.roles:
+        for p in role.permissions:
+            if p.id not in seen:
+                seen.add(p.id)
+                permissions.append({"id": p.id, "name": p.name, "code": p.code, "type": p.type})
+    return permissions
+
+
+async def legacy_get_permissions() -> list:
+    return await Permission.all().offset(0).limit(PAGE_SIZE).all()
+
+
+# ---------- 投影实现 ----------
+
+CASES = [
+    ("get_users", legacy_get_users,
+     lambda: UserService.get_users(1, PAGE_SIZE, total_mode="none")),
+    ("get_roles_with_permissions", legacy_get_roles_with_permissions,
+     lambda: RoleService.get_roles_with_permissions(1, PAGE_SIZE, total_mode="none")),
+    ("get_role_permissions", legacy_get_role_permissions,
+     lambda: RoleService.get_role_permissions(1)),
+    ("get_user_permissions", legacy_get_user_permissions,
+     lambda: UserService.get_user_permissions(1)),
+    ("get_permissions", legacy_get_permissions,
+     lambda: PermissionService.get_permissions(1, PAGE_SIZE, total_mode="none")),
+]
+
+
+async def measure(func, repeat: int):
+    """返回最优一次的耗时（毫秒）和一次调用的内存分配峰值（KB）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    await func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024
+
+
+async def run(args):
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["app.models"]})
+    await Tortoise.generate_schemas()
+    try:
+        await seed(args.users, args.roles, args.permissions)
+        print(f"用户数: {args.users}，角色数: {args.roles}，权限数: {args.permissions}，每页 {PAGE_SIZE} 条")
+        print(f"{'接口':<30}{'原实现(ms)':>12}{'投影(ms)':>10}{'加速比':>8}{'原峰值(KB)':>12}{'投影峰值(KB)':>14}")
+        for name, legacy, projected in CASES:
+            old_ms, old_kb = await measure(legacy, args.repeat)
+            new_ms, new_kb = await measure(projected, args.repeat)
+            print(f"{name:<30}{old_ms:>12.2f}{new_ms:>10.2f}{old_ms / new_ms:>7.2f}x{old_kb:>12.1f}{new_kb:>14.1f}")
+    finally:
+        await Tortoise.close_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="字段投影基准测试")
+    parser.add_argument("--users", type=int, default=5000, help="用户数量")
+    parser.add_argument("--roles", type=int, default=200, help="角色数量")
+    parser.add_argument("--permissions", type=int, default=2000, help="权限数量")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例重复次数（取最优）")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
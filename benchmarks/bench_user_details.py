@@ -0,0 +1,113 @@
+"""
+用户详情列表基准测试：对比原实现（分页查询 + 预取资料和角色，创建模型实例后转字典）与
+单条连接聚合 SQL 的 get_users_with_details，使用内存 SQLite 数据库
+
+运行方式（项目根目录）:
+    python -m benchmarks.bench_user_details
+    python -m benchmarks.bench_user_details --users 20000 --page-sizes 10 100 1000 --repeat 5
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List
+
+from tortoise import Tortoise
+
+from app.models.user import User, Profile
+from app.models.role import Role
+from app.services.user import UserService
+
+
+async def seed(users: int, roles: int):
+    """生成用户、资料和角色，每个用户随机分配 0~3 个角色"""
+    rng = random.Random(users)
+    await Role.bulk_create([
+        Role(id=role_id, code=f"ROLE_{role_id}", name=f"角色{role_id}", enable=rng.random() > 0.2)
+        for role_id in range(1, roles + 1)
+    ])
+    await User.bulk_create([
+        User(id=user_id, username=f"user{user_id:07d}", password="x", enable=rng.random() > 0.1)
+        for user_id in range(1, users + 1)
+    ], batch_size=5000)
+    await Profile.bulk_create([
+        Profile(user_id=user_id, gender=rng.choice([None, 0, 1]), email=f"user{user_id}@example.com")
+        for user_id in range(1, users + 1)
+    ], batch_size=5000)
+
+    links = []
+    for user_id in range(1, users + 1):
+        for role_id in rng.sample(range(1, roles + 1), rng.randint(0, 3)):
+            links.append((user_id, role_id))
+    db = Tortoise.get_connection("default")
+    await db.execute_many('INSERT INTO "user_roles_role" ("userId", "roleId") VALUES (?, ?)', links)
+
+
+async def legacy(page_size: int) -> List[Dict[str, Any]]:
+    """原实现：预取资料和角色，逐个模型实例转字典"""
+    users = await User.all().prefetch_related("profile", "roles").offset(0).limit(page_size).all()
+    user_list = []
+    for user in users:
+        roles = [{"id": role.id, "code": role.code, "name": role.name, "enable": role.enable} for role in user.roles]
+        gender, email = None, None
+        avatar = "https://wpimg.wallstcn.com/f778738c-e4f8-4870-b634-56703b4acafe.gif?imageView2/1/w/80/h/80"
+        if hasattr(user, "profile") and user.profile:
+            gender, avatar, email = user.profile.gender, user.profile.avatar, user.profile.email
+        user_list.append({
+            "id": user.id,
+            "username": user.username,
+            "enable": user.enable,
+            "createTime": user.create_time.isoformat() + "Z" if user.create_time else None,
+            "updateTime": user.update_time.isoformat() + "Z" if user.update_time else None,
+            "roles": roles,
+            "gender": gender,
+            "avatar": avatar,
+            "email": email,
+        })
+    return user_list
+
+
+async def joined(page_size: int) -> List[Dict[str, Any]]:
+    result = await UserService.get_users_with_details(1, page_size, total_mode="none")
+    return result["pageData"]
+
+
+async def measure(func, page_size: int, repeat: int) -> float:
+    """返回最优一次的耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func(page_size)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def run(args):
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["app.models"]})
+    await Tortoise.generate_schemas()
+    try:
+        await seed(args.users, args.roles)
+        # 两种实现的结果必须一致
+        assert await legacy(args.page_sizes[0]) == await joined(args.page_sizes[0])
+
+        print(f"用户数: {args.users}，角色数: {args.roles}")
+        print(f"{'每页条数':>8}{'原实现(ms)':>16}{'连接查询(ms)':>16}{'加速比':>10}")
+        for page_size in args.page_sizes:
+            old = await measure(legacy, page_size, args.repeat)
+            new = await measure(joined, page_size, args.repeat)
+            print(f"{page_size:>12}{old:>16.2f}{new:>16.2f}{old / new:>10.2f}x")
+    finally:
+        await Tortoise.close_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="用户详情列表基准测试")
+    parser.add_argument("--users", type=int, default=20000, help="用户数量")
+    parser.add_argument("--roles", type=int, default=20, help="角色数量")
+    parser.add_argument("--page-sizes", type=int, nargs="*", default=[10, 100, 1000], help="每页条数")
+    parser.add_argument("--repeat", type=int, default=5, help="每个用例重复次数（取最优）")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,6 +16,8 @@
 
 SET NAMES utf8mb4;
 SET FOREIGN_KEY_CHECKS = 0;
+-- 全文索引在创建时读取该设置：ngram 分词下停用词会排除包含它的全部词元，列表过滤需要关闭
+SET SESSION innodb_ft_enable_stopword = OFF;
 
 -- ----------------------------
 -- Table structure for permission
@@ -39,7 +41,9 @@ CREATE TABLE `permission` (
   `enable` tinyint NOT NULL DEFAULT '1',
   `order` int DEFAULT NULL,
   PRIMARY KEY (`id`) USING BTREE,
-  UNIQUE KEY `IDX_30e166e8c6359970755c5727a2` (`code`) USING BTREE
+  UNIQUE KEY `IDX_30e166e8c6359970755c5727a2` (`code`) USING BTREE,
+  FULLTEXT KEY `ft_permission_name` (`name`) WITH PARSER ngram,
+  FULLTEXT KEY `ft_permission_code` (`code`) WITH PARSER ngram
 ) ENGINE=InnoDB AUTO_INCREMENT=32 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci ROW_FORMAT=DYNAMIC;
 
 -- ----------------------------
@@ -55,6 +59,20 @@ INSERT INTO `permission` (`id`, `name`, `code`, `type`, `parentId`, `path`, `red
 INSERT INTO `permission` (`id`, `name`, `code`, `type`, `parentId`, `path`, `redirect`, `icon`, `component`, `layout`, `keepAlive`, `method`, `description`, `show`, `enable`, `order`) VALUES (13, '创建新用户', 'AddUser', 'BUTTON', 4, NULL, NULL, NULL, NULL, NULL, NULL, NULL, NULL, 1, 1, 1);
 COMMIT;
 
+-- ----------------------------
+-- Table structure for permission_closure
+-- ----------------------------
+DROP TABLE IF EXISTS `permission_closure`;
+CREATE TABLE `permission_closure` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `ancestorId` int NOT NULL,
+  `descendantId` int NOT NULL,
+  `depth` int NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uid_permission__ancesto_closure` (`ancestorId`,`descendantId`),
+  KEY `idx_permission__descend_closure` (`descendantId`,`depth`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='权限闭包表模型';
+
 -- ----------------------------
 -- Table structure for profile
 -- ----------------------------
@@ -89,7 +107,9 @@ CREATE TABLE `role` (
   `enable` tinyint(1) NOT NULL DEFAULT '1',
   PRIMARY KEY (`id`),
   UNIQUE KEY `code` (`code`),
-  UNIQUE KEY `name` (`name`)
+  UNIQUE KEY `name` (`name`),
+  FULLTEXT KEY `ft_role_code` (`code`) WITH PARSER ngram,
+  FULLTEXT KEY `ft_role_name` (`name`) WITH PARSER ngram
 ) ENGINE=InnoDB AUTO_INCREMENT=3 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='角色模型';
 
 -- ----------------------------
@@ -137,7 +157,9 @@ CREATE TABLE `user` (
   `createTime` datetime(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
   `updateTime` datetime(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
   PRIMARY KEY (`id`),
-  UNIQUE KEY `username` (`username`)
+  UNIQUE KEY `username` (`username`),
+  KEY `idx_user_create_time_id` (`createTime`,`id`),
+  FULLTEXT KEY `ft_user_username` (`username`) WITH PARSER ngram
 ) ENGINE=InnoDB AUTO_INCREMENT=3 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='用户模型';
 
 -- ----------------------------